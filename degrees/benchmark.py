@@ -0,0 +1,136 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from degrees import *
+from graph import StarGraph
+from nameindex import NameIndex
+
+
+def time_search(search, pairs):
+    start_time = time.time()
+    lengths = []
+    for source, target in pairs:
+        path = search(source, target)
+        lengths.append(None if path is None else len(path))
+    return time.time() - start_time, lengths
+
+
+def eager_shortest_path(source, target, counts):
+    """
+    shortest_path as it was before lazy neighbors: the full neighbor
+    set is built for every node, and the goal test waits for dequeue.
+    """
+    frontier = QueueFrontier()
+    frontier.add(Node(state=source, parent=None, action=None))
+    explored = set()
+    while not frontier.empty():
+        node = frontier.remove()
+        counts["expanded"] += 1
+        if node.state == target:
+            return []
+        explored.add(node.state)
+        for action, state in neighbors_for_person(node.state):
+            counts["generated"] += 1
+            if not frontier.contains_state(state) and state not in explored:
+                frontier.add(Node(state=state, parent=node, action=action))
+    return None
+
+
+def lazy_shortest_path(source, target, counts):
+    """
+    shortest_path, counting the nodes it expands and generates.
+    """
+    iter_neighbors = degrees.iter_neighbors
+
+    def counting_neighbors(*args):
+        counts["expanded"] += 1
+        for neighbor in iter_neighbors(*args):
+            counts["generated"] += 1
+            yield neighbor
+
+    degrees.iter_neighbors = counting_neighbors
+    try:
+        return shortest_path(source, target)
+    finally:
+        degrees.iter_neighbors = iter_neighbors
+
+
+def measure_search(search, pairs):
+    counts = {"expanded": 0, "generated": 0}
+    peak = 0
+    for source, target in pairs:
+        tracemalloc.start()
+        search(source, target, counts)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return counts, peak
+
+
+def measure_load(load, directory):
+    tracemalloc.start()
+    start_time = time.time()
+    result = load(directory)
+    elapsed_time = time.time() - start_time
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed_time, memory
+
+
+directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+queries = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+print("Loading data...")
+# Time the CSV load on its own, then the snapshot it writes
+_, csv_load_time, csv_memory = measure_load(
+    lambda directory: load_data(directory, rebuild=True), directory
+)
+for table in (names, people, movies):
+    table.clear()
+_, snapshot_load_time, snapshot_memory = measure_load(load_data, directory)
+graph, csr_load_time, csr_memory = measure_load(StarGraph.from_csv, directory)
+print("Data loaded.")
+
+random.seed(0)
+person_ids = list(people)
+pairs = [(random.choice(person_ids), random.choice(person_ids))
+         for _ in range(queries)]
+
+searches = [
+    ("BFS", shortest_path),
+    ("Bidirectional", bidirectional_shortest_path),
+    ("CSR BFS", graph.shortest_path),
+]
+results = [(name, *time_search(search, pairs)) for name, search in searches]
+
+if any(lengths != results[0][2] for _, _, lengths in results):
+    sys.exit("Path lengths differ between searches.")
+
+print(f"Dict load (CSV):      {csv_load_time:.2f} seconds, {csv_memory / 2 ** 20:.1f} MiB")
+print(f"Dict load (snapshot): {snapshot_load_time:.2f} seconds, "
+      f"{snapshot_memory / 2 ** 20:.1f} MiB")
+print(f"CSR load:             {csr_load_time:.2f} seconds, {csr_memory / 2 ** 20:.1f} MiB")
+print(f"Queries: {queries}")
+for name, elapsed_time, _ in results:
+    print(f"{name + ':':15}{elapsed_time:.2f} seconds, "
+          f"{elapsed_time / queries * 1000:.2f} ms/query")
+
+for name, search in [("Eager", eager_shortest_path), ("Lazy", lazy_shortest_path)]:
+    counts, peak = measure_search(search, pairs)
+    print(f"{name + ' neighbors:':17}{counts['expanded']} expanded, "
+          f"{counts['generated']} generated, {peak / 2 ** 10:.0f} KiB peak")
+
+index = NameIndex(names)
+sample = random.sample(sorted(names), min(queries, len(names)))
+start_time = time.time()
+for name in sample:
+    index.prefix(name[:3])
+prefix_time = time.time() - start_time
+start_time = time.time()
+for name in sample:
+    index.fuzzy(name[:-1])
+fuzzy_time = time.time() - start_time
+print(f"Prefix lookup: {prefix_time / len(sample) * 1000:.3f} ms/query")
+print(f"Fuzzy lookup:  {fuzzy_time / len(sample) * 1000:.3f} ms/query")
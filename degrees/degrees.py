@@ -1,6 +1,12 @@
+import argparse
 import csv
+import marshal
+import mmap
+import os
+import struct
 import sys
 
+from nameindex import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +18,23 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Binary snapshot of the three dicts above and a NameIndex over names,
+# kept next to the CSV files
+SNAPSHOT = ".degrees.snapshot"
+SNAPSHOT_VERSION = 2
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
 
-def load_data(directory):
+
+def load_data(directory, rebuild=False):
     """
     Load data from CSV files into memory.
+
+    Uses the snapshot in `directory` when it is newer than the CSV
+    files, and writes a fresh one otherwise (or when `rebuild` is set).
     """
+    if not rebuild and load_snapshot(directory):
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,25 +69,125 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    save_snapshot(directory)
+
+
+def csv_stamp(directory):
+    """
+    Returns the (name, mtime, size) of each CSV file, which
+    a snapshot must match to be used.
+    """
+    stamp = []
+    for name in CSV_FILES:
+        stat = os.stat(os.path.join(directory, name))
+        stamp.append((name, stat.st_mtime_ns, stat.st_size))
+    return (SNAPSHOT_VERSION, tuple(stamp))
+
+
+def read_snapshot(directory, section):
+    """
+    Returns one section of the snapshot in `directory`: 0 for names,
+    people and movies, 1 for the name index. Returns None if there is
+    no snapshot or it is out of date.
+    """
+    try:
+        f = open(os.path.join(directory, SNAPSHOT), "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                header_size, = struct.unpack_from("<Q", view)
+                stamp = marshal.loads(view[8:8 + header_size])
+                if stamp != csv_stamp(directory):
+                    return None
+                data_size, = struct.unpack_from("<Q", view, 8 + header_size)
+                start = 16 + header_size
+                if section == 0:
+                    return marshal.loads(view[start:start + data_size])
+                return marshal.loads(view[start + data_size:])
+    except (EOFError, ValueError, TypeError, struct.error):
+        # Empty, truncated or foreign file: rebuild from the CSVs
+        return None
+
+
+def load_snapshot(directory):
+    """
+    Fills names, people and movies from the snapshot in `directory`.
+    Returns False if there is no snapshot or it is out of date.
+    """
+    data = read_snapshot(directory, 0)
+    if data is None:
+        return False
+
+    names.update(data[0])
+    people.update(data[1])
+    movies.update(data[2])
+    return True
+
+
+def save_snapshot(directory):
+    """
+    Writes names, people and movies to the snapshot in `directory`,
+    followed by a NameIndex over names so that suggesting names does
+    not have to build one.
+    """
+    header = marshal.dumps(csv_stamp(directory))
+    data = marshal.dumps((names, people, movies))
+    path = os.path.join(directory, SNAPSHOT)
+    try:
+        with open(path + ".tmp", "wb") as f:
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(struct.pack("<Q", len(data)))
+            f.write(data)
+            marshal.dump(NameIndex(names).dump(), f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        # A read-only dataset still works, just without the cache
+        pass
+
+
+def load_name_index(directory):
+    """
+    Returns a NameIndex over names, from the snapshot in `directory`
+    if it is up to date, or else built from scratch.
+    """
+    data = read_snapshot(directory, 1)
+    if data is None:
+        return NameIndex(names)
+    return NameIndex.load(names, data)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="degrees.py",
+        description="Find the degrees of separation between two actors."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="reload the CSV files and refresh the snapshot")
+    parser.add_argument("--pick", choices=["ask", *PICK_POLICIES], default="ask",
+                        help="how to choose among people with the same name")
+    return parser.parse_args(argv)
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = parse_args(sys.argv[1:])
+    directory = args.directory
+    search = bidirectional_shortest_path if args.bidirectional else shortest_path
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, rebuild=args.rebuild)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
-    if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
-    if target is None:
-        sys.exit("Person not found.")
+    source = lookup(input("Name: "), args.pick, directory)
+    target = lookup(input("Name: "), args.pick, directory)
 
-    path = shortest_path(source, target)
+    path = search(source, target)
 
     if path is None:
         print("Not connected.")
@@ -84,6 +202,21 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
+def lookup(name, policy, directory):
+    """
+    Resolves a name for main, suggesting close matches on failure.
+    """
+    person_id = person_id_for_name(name, policy)
+    if person_id is None:
+        suggestions = load_name_index(directory).fuzzy(name, limit=5)
+        if suggestions:
+            print("Did you mean: " + ", ".join(
+                people[next(iter(names[match]))]["name"] for _, match in suggestions
+            ) + "?")
+        sys.exit("Person not found.")
+    return person_id
+
+
 def shortest_path(source, target):
     """
     Returns the shortest list of (movie_id, person_id) pairs
@@ -92,11 +225,16 @@ def shortest_path(source, target):
     If no possible path, returns None.
     """
 
+    if source == target:
+        return []
+
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
     frontier.add(start)
 
-    explored = set()
+    # People already in the frontier or explored, and movies already expanded
+    reached = {source}
+    expanded_movies = set()
 
     while True:
         if frontier.empty():
@@ -104,37 +242,103 @@ def shortest_path(source, target):
 
         node = frontier.remove()
 
-        if node.state == target:
-            # movie_actions = []
-            # people_ids = []
-            path = []
-            while node.parent is not None:
-                # movie_actions.append(node.action)
-                # people_ids.append(node.state)
-                path.append((node.action, node.state))
-                node = node.parent
-            # movie_actions.reverse()
-            # people_ids.reverse()
-            path.reverse()
-            # self.solution = (movie_actions, people_ids)
-            return path
+        # Goal test each child as it is generated, one layer earlier
+        # than waiting for it to be dequeued
+        for action, state in iter_neighbors(node.state, reached, expanded_movies):
+            child = Node(state=state, parent=node, action=action)
+            if state == target:
+                path = []
+                while child.parent is not None:
+                    path.append((child.action, child.state))
+                    child = child.parent
+                path.reverse()
+                return path
+            reached.add(state)
+            frontier.add(child)
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Same result as shortest_path, but searches from the source and
+    the target at the same time, always expanding one whole layer of
+    the smaller frontier, and joins the two halves once they meet.
+    """
+    if source == target:
+        return []
+
+    # Maps person_id to (movie_id, person_id) of the step towards
+    # the source (forward) or the target (backward)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        is_forward = len(forward_frontier) <= len(backward_frontier)
+        if is_forward:
+            frontier, parents, other = forward_frontier, forward, backward
+        else:
+            frontier, parents, other = backward_frontier, backward, forward
+
+        next_frontier = []
+        meeting = None
+        for person_id in frontier:
+            for movie_id, neighbor_id in iter_neighbors(person_id, parents):
+                parents[neighbor_id] = (movie_id, person_id)
+                if neighbor_id in other:
+                    # Every meeting in this layer gives the same total
+                    # length, since the other side is a complete BFS ball
+                    meeting = neighbor_id
+                    break
+                next_frontier.append(neighbor_id)
+            if meeting is not None:
+                break
 
-        explored.add(node.state)
+        if meeting is not None:
+            return _join_paths(forward, backward, meeting)
 
-        for action, state in neighbors_for_person(node.state):
-            if not frontier.contains_state(state) and state not in explored:
-                child = Node(state=state, parent=node, action=action)
-                frontier.add(child)
+        if is_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
 
+    return None
 
-def person_id_for_name(name):
+
+def _join_paths(forward, backward, meeting):
+    """
+    Builds a source-to-target path through `meeting` from the
+    forward and backward parent maps of a bidirectional search.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child_id = backward[person_id]
+        path.append((movie_id, child_id))
+        person_id = child_id
+    return path
+
+
+def person_id_for_name(name, policy="ask"):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    With policy "ask" the user picks among people sharing a name;
+    any other policy from PICK_POLICIES picks one without prompting.
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and policy != "ask":
+        return pick_person(person_ids, policy)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -153,17 +357,53 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def _birth_key(person_id):
+    birth = people[person_id]["birth"]
+    return (int(birth) if birth.isdigit() else float("inf"), person_id)
+
+
+# Ways to choose among people sharing a name, without prompting
+PICK_POLICIES = {
+    "most-movies": lambda person_ids: max(
+        person_ids, key=lambda p: (len(people[p]["movies"]), p)
+    ),
+    "earliest-birth": lambda person_ids: min(person_ids, key=_birth_key),
+}
+
+
+def pick_person(person_ids, policy):
+    """
+    Chooses one of several person_ids using a policy from PICK_POLICIES.
+    """
+    try:
+        return PICK_POLICIES[policy](person_ids)
+    except KeyError:
+        raise ValueError(f"unknown pick policy: {policy}")
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return set(iter_neighbors(person_id))
+
+
+def iter_neighbors(person_id, visited=(), expanded_movies=None):
+    """
+    Lazily yields (movie_id, person_id) pairs for people who starred
+    with a given person, skipping anyone in `visited` at the time they
+    would be yielded. If `expanded_movies` is given, movies in it are
+    skipped and each movie walked is added to it.
+    """
+    for movie_id in people[person_id]["movies"]:
+        if expanded_movies is not None:
+            if movie_id in expanded_movies:
+                continue
+            expanded_movies.add(movie_id)
+        for star_id in movies[movie_id]["stars"]:
+            if star_id not in visited:
+                yield movie_id, star_id
 
 
 if __name__ == "__main__":
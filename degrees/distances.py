@@ -0,0 +1,197 @@
+import argparse
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from multiprocessing import Pool
+
+from graph import StarGraph
+
+MAGIC = b"DEGD"
+HEADER = struct.Struct("<4sIiI")
+FORMAT_VERSION = 1
+
+
+class Distances():
+    """
+    Result of one breadth-first search from `source` over a StarGraph:
+    the degree of separation of every person (-1 if not connected), and
+    the person and movie each one was first reached through.
+    """
+
+    def __init__(self, source, distance, parent, via):
+        self.source = source
+        self.distance = distance
+        self.parent = parent
+        self.via = via
+
+    @classmethod
+    def compute(cls, graph, source):
+        """
+        Runs a single-source BFS from person index `source`
+        across its whole connected component.
+        """
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+
+        distance = array("h", [-1]) * len(graph.person_ids)
+        parent = array("i", [-1]) * len(graph.person_ids)
+        via = array("i", [-1]) * len(graph.person_ids)
+        movie_seen = bytearray(len(graph.movie_ids))
+        distance[source] = 0
+        parent[source] = source
+
+        # Layer by layer, so no per-node queue bookkeeping is needed
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for k in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[k]
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for s in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[s]
+                        if distance[star] == -1:
+                            distance[star] = depth
+                            parent[star] = person
+                            via[star] = movie
+                            next_layer.append(star)
+            layer = next_layer
+
+        return cls(source, distance, parent, via)
+
+    def histogram(self):
+        """
+        Returns a Counter of how many people are at each degree.
+        """
+        counts = Counter(self.distance)
+        counts.pop(-1, None)
+        return counts
+
+    def path(self, graph, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs from
+        the source to `target_id`, or None if they are not connected.
+        """
+        target = graph.person_index[target_id]
+        if self.distance[target] == -1:
+            return None
+        return graph.path(self.parent, self.via, self.source, target)
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.source,
+                                len(self.distance)))
+            self.distance.tofile(f)
+            self.parent.tofile(f)
+            self.via.tofile(f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as f:
+            magic, version, source, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"not a distances file: {filename}")
+            distance, parent, via = array("h"), array("i"), array("i")
+            distance.fromfile(f, count)
+            parent.fromfile(f, count)
+            via.fromfile(f, count)
+        return cls(source, distance, parent, via)
+
+
+# Graph shared by pool workers, set once per process by _init_worker
+_graph = None
+
+
+def _init_worker(graph):
+    global _graph
+    _graph = graph
+
+
+def _compute_and_save(job):
+    source, filename = job
+    distances = Distances.compute(_graph, source)
+    distances.save(filename)
+    return source, filename, distances.histogram()
+
+
+def compute_all(graph, sources, output, processes=None):
+    """
+    Computes and saves the distances from each person index in
+    `sources` in parallel, one file per source in directory `output`.
+    Yields (source, filename, histogram) as each one finishes.
+    """
+    os.makedirs(output, exist_ok=True)
+    jobs = [(source, os.path.join(output, f"{graph.person_ids[source]}.dist"))
+            for source in sources]
+    with Pool(processes, initializer=_init_worker, initargs=(graph,)) as pool:
+        yield from pool.imap_unordered(_compute_and_save, jobs)
+
+
+def person_for(graph, name):
+    """
+    Returns the person index for an IMDb id or an unambiguous name.
+    """
+    if name in graph.person_index:
+        return graph.person_index[name]
+    matches = graph.names.get(name.lower(), [])
+    if len(matches) != 1:
+        sys.exit(f"{'Ambiguous' if matches else 'Unknown'} person: {name}")
+    return matches[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="distances.py",
+        description="Compute the degree of separation from people to everyone."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--source", action="append", default=[],
+                        help="name or IMDb id to compute from (repeatable)")
+    parser.add_argument("--output", default="distances",
+                        help="directory to save distance files to")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--query", nargs=2, metavar=("FILE", "TARGET"),
+                        help="print the path to TARGET from a saved file")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    graph = StarGraph.from_csv(args.directory)
+    print("Data loaded.")
+
+    if args.query:
+        filename, target = args.query
+        distances = Distances.load(filename)
+        if len(distances.distance) != len(graph.person_ids):
+            sys.exit("Distance file does not match this dataset.")
+        path = distances.path(graph, graph.person_ids[person_for(graph, target)])
+        if path is None:
+            print("Not connected.")
+            return
+        print(f"{len(path)} degrees of separation.")
+        person = graph.person_names[distances.source]
+        for i, (movie_id, person_id) in enumerate(path):
+            movie = graph.movie_titles[graph.movie_index[movie_id]]
+            next_person = graph.person_names[graph.person_index[person_id]]
+            print(f"{i + 1}: {person} and {next_person} starred in {movie}")
+            person = next_person
+        return
+
+    if not args.source:
+        parser.error("give at least one --source, or --query")
+    sources = [person_for(graph, name) for name in args.source]
+    for source, filename, histogram in compute_all(graph, sources, args.output,
+                                                   args.processes):
+        print(f"{graph.person_names[source]} -> {filename}")
+        for degree in sorted(histogram):
+            print(f"  {degree}: {histogram[degree]}")
+        print(f"  not connected: {len(graph.person_ids) - sum(histogram.values())}")
+
+
+if __name__ == "__main__":
+    main()
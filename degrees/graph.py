@@ -0,0 +1,232 @@
+import csv
+from array import array
+from collections import deque
+
+
+class StarGraph():
+    """
+    Compact form of the degrees dataset.
+
+    People and movies are interned to dense ints (their position in
+    `person_ids` / `movie_ids`), and the bipartite "starred in" graph is
+    kept as two compressed-sparse-row adjacency lists: the movies of
+    person p are person_movies[person_offsets[p]:person_offsets[p + 1]],
+    and the stars of movie m are movie_stars[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self):
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.person_index = {}
+
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+        self.movie_index = {}
+
+        # Maps lowercase names to a list of person indices
+        self.names = {}
+
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Loads the graph straight from the CSV files in `directory`,
+        without building the dict-of-sets representation.
+        """
+        graph = cls()
+
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            id_col, name_col, birth_col = (header.index("id"), header.index("name"),
+                                           header.index("birth"))
+            for row in reader:
+                graph.add_person(row[id_col], row[name_col], row[birth_col])
+
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            id_col, title_col, year_col = (header.index("id"), header.index("title"),
+                                           header.index("year"))
+            for row in reader:
+                graph.add_movie(row[id_col], row[title_col], row[year_col])
+
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            person_col, movie_col = header.index("person_id"), header.index("movie_id")
+            graph.build(
+                (row[person_col], row[movie_col]) for row in reader
+            )
+
+        return graph
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Builds the graph from the `people` and `movies` dicts
+        filled in by degrees.load_data.
+        """
+        graph = cls()
+        for person_id, person in people.items():
+            graph.add_person(person_id, person["name"], person["birth"])
+        for movie_id, movie in movies.items():
+            graph.add_movie(movie_id, movie["title"], movie["year"])
+        graph.build(
+            (person_id, movie_id)
+            for person_id, person in people.items()
+            for movie_id in person["movies"]
+        )
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        self.person_index[person_id] = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.names.setdefault(name.lower(), []).append(self.person_index[person_id])
+
+    def add_movie(self, movie_id, title, year):
+        self.movie_index[movie_id] = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+
+    def build(self, stars):
+        """
+        Fills the CSR arrays from an iterable of (person_id, movie_id)
+        pairs. Pairs naming unknown people or movies are skipped, and
+        duplicates are stored once.
+        """
+        movie_count = len(self.movie_ids)
+        keys = set()
+        for person_id, movie_id in stars:
+            try:
+                keys.add(self.person_index[person_id] * movie_count
+                         + self.movie_index[movie_id])
+            except KeyError:
+                pass
+        keys = sorted(keys)
+
+        # Sorted keys are grouped by person, so person rows come out in order
+        person_degree = array("i", [0]) * len(self.person_ids)
+        movie_degree = array("i", [0]) * movie_count
+        self.person_movies = array("i", [0]) * len(keys)
+        for k, key in enumerate(keys):
+            person, movie = divmod(key, movie_count)
+            self.person_movies[k] = movie
+            person_degree[person] += 1
+            movie_degree[movie] += 1
+
+        self.person_offsets = _offsets(person_degree)
+        self.movie_offsets = _offsets(movie_degree)
+
+        # Counting sort of the same pairs by movie
+        self.movie_stars = array("i", [0]) * len(keys)
+        fill = array("i", self.movie_offsets[:-1])
+        for key in keys:
+            person, movie = divmod(key, movie_count)
+            self.movie_stars[fill[movie]] = person
+            fill[movie] += 1
+
+    def movies_for(self, person):
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_for(self, movie):
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for s in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[s]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Same as degrees.neighbors_for_person, over the CSR arrays.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using IMDb ids.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if source == target:
+            return []
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        # parent[p] is the person p was reached from, via movie via[p]
+        parent = array("i", [-1]) * len(self.person_ids)
+        via = array("i", [-1]) * len(self.person_ids)
+        movie_seen = bytearray(len(self.movie_ids))
+        parent[source] = source
+
+        queue = deque([source])
+        while queue:
+            person = queue.popleft()
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+
+                # Every star of a movie is reached the first time it is expanded
+                if movie_seen[movie]:
+                    continue
+                movie_seen[movie] = 1
+
+                for s in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[s]
+                    if parent[star] != -1:
+                        continue
+                    parent[star] = person
+                    via[star] = movie
+                    if star == target:
+                        return self.path(parent, via, source, target)
+                    queue.append(star)
+
+        return None
+
+    def path(self, parent, via, source, target):
+        """
+        Follows parent links back from target to source and returns
+        the path as (movie_id, person_id) pairs.
+        """
+        path = []
+        person = target
+        while person != source:
+            path.append((self.movie_ids[via[person]], self.person_ids[person]))
+            person = parent[person]
+        path.reverse()
+        return path
+
+
+def _offsets(degrees):
+    """
+    Returns the prefix sums of `degrees`, starting at 0.
+    """
+    offsets = array("i", [0]) * (len(degrees) + 1)
+    total = 0
+    for i, degree in enumerate(degrees):
+        total += degree
+        offsets[i + 1] = total
+    return offsets
@@ -0,0 +1,214 @@
+import argparse
+import heapq
+import random
+import struct
+import sys
+import time
+from array import array
+
+from distances import Distances, person_for
+from graph import StarGraph
+
+MAGIC = b"DEGL"
+HEADER = struct.Struct("<4sIII")
+FORMAT_VERSION = 1
+
+
+class Landmarks():
+    """
+    Precomputed degrees from a few well-connected people ("landmarks")
+    to everyone. By the triangle inequality, for any landmark L:
+
+        |d(s, L) - d(L, t)| <= d(s, t) <= d(s, L) + d(L, t)
+
+    which gives instant bounds on a query and lets the exact search
+    drop people who cannot lie on a path within the upper bound.
+    """
+
+    def __init__(self, landmarks, distances):
+        # distances[i] holds the degree from landmarks[i] to every
+        # person index, or -1 if they are not connected
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=16):
+        """
+        Picks the `count` people with the most movies as landmarks
+        and runs one BFS from each.
+        """
+        people = range(len(graph.person_ids))
+        offsets = graph.person_offsets
+        landmarks = heapq.nlargest(count, people, key=lambda p: offsets[p + 1] - offsets[p])
+        distances = []
+        for landmark in landmarks:
+            distance = Distances.compute(graph, landmark).distance
+            distances.append(array("b", (min(d, 127) for d in distance)))
+        return cls(landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degree between two person
+        indices. upper is None if no landmark reaches both, and both
+        are None if a landmark shows they are not connected at all.
+        """
+        lower, upper = 0, None
+        for distance in self.distances:
+            s, t = distance[source], distance[target]
+            if (s == -1) != (t == -1):
+                return None, None
+            if s == -1:
+                continue
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        return lower, upper
+
+    def shortest_path(self, graph, source, target):
+        """
+        Same result as StarGraph.shortest_path, pruning people whose
+        lower bound to the target would exceed the landmark upper bound.
+        """
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+        if source == target:
+            return []
+        lower, upper = self.bounds(source, target)
+        if lower is None:
+            return None
+
+        person_offsets, person_movies = graph.person_offsets, graph.person_movies
+        movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+        target_distances = [(distance, distance[target]) for distance in self.distances
+                            if distance[target] != -1]
+
+        parent = array("i", [-1]) * len(graph.person_ids)
+        via = array("i", [-1]) * len(graph.person_ids)
+        movie_seen = bytearray(len(graph.movie_ids))
+        parent[source] = source
+
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for k in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[k]
+                    if movie_seen[movie]:
+                        continue
+                    movie_seen[movie] = 1
+                    for s in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[s]
+                        if parent[star] != -1:
+                            continue
+                        parent[star] = person
+                        via[star] = movie
+                        if star == target:
+                            return graph.path(parent, via, source, target)
+                        if upper is not None and any(
+                            depth + abs(distance[star] - t) > upper
+                            for distance, t in target_distances
+                        ):
+                            continue
+                        next_layer.append(star)
+            layer = next_layer
+
+        return None
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            count = len(self.distances[0]) if self.distances else 0
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(self.landmarks), count))
+            array("i", self.landmarks).tofile(f)
+            for distance in self.distances:
+                distance.tofile(f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as f:
+            magic, version, k, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"not a landmarks file: {filename}")
+            landmarks = array("i")
+            landmarks.fromfile(f, k)
+            distances = []
+            for _ in range(k):
+                distance = array("b")
+                distance.fromfile(f, count)
+                distances.append(distance)
+        return cls(list(landmarks), distances)
+
+
+def benchmark(graph, landmarks, queries):
+    random.seed(0)
+    pairs = [(random.choice(graph.person_ids), random.choice(graph.person_ids))
+             for _ in range(queries)]
+
+    start_time = time.time()
+    for source, target in pairs:
+        landmarks.bounds(graph.person_index[source], graph.person_index[target])
+    estimate_time = time.time() - start_time
+
+    start_time = time.time()
+    exact = [graph.shortest_path(source, target) for source, target in pairs]
+    bfs_time = time.time() - start_time
+
+    start_time = time.time()
+    pruned = [landmarks.shortest_path(graph, source, target) for source, target in pairs]
+    pruned_time = time.time() - start_time
+
+    if [p and len(p) for p in exact] != [p and len(p) for p in pruned]:
+        sys.exit("Path lengths differ between searches.")
+    print(f"Queries: {queries}")
+    for name, elapsed_time in [("Estimate", estimate_time), ("CSR BFS", bfs_time),
+                               ("Pruned BFS", pruned_time)]:
+        print(f"{name + ':':12}{elapsed_time / queries * 1000:.3f} ms/query")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="landmarks.py",
+        description="Precompute landmark degrees for instant bounds and pruned search."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--file", default="landmarks.bin",
+                        help="landmarks file to write or read")
+    parser.add_argument("--build", type=int, metavar="COUNT",
+                        help="pick COUNT landmarks and save their degrees")
+    parser.add_argument("--query", nargs=2, metavar=("SOURCE", "TARGET"))
+    parser.add_argument("--benchmark", type=int, metavar="QUERIES")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    graph = StarGraph.from_csv(args.directory)
+    print("Data loaded.")
+
+    if args.build:
+        landmarks = Landmarks.build(graph, args.build)
+        landmarks.save(args.file)
+        names = ", ".join(graph.person_names[p] for p in landmarks.landmarks)
+        print(f"Saved {len(landmarks.landmarks)} landmarks to {args.file}: {names}")
+    else:
+        landmarks = Landmarks.load(args.file)
+        if landmarks.distances and len(landmarks.distances[0]) != len(graph.person_ids):
+            sys.exit("Landmarks file does not match this dataset.")
+
+    if args.query:
+        source, target = (person_for(graph, name) for name in args.query)
+        lower, upper = landmarks.bounds(source, target)
+        if lower is None:
+            print("Not connected.")
+        else:
+            print(f"Estimate: {lower} to {'?' if upper is None else upper} degrees.")
+            path = landmarks.shortest_path(graph, graph.person_ids[source],
+                                           graph.person_ids[target])
+            print("Not connected." if path is None
+                  else f"{len(path)} degrees of separation.")
+
+    if args.benchmark:
+        benchmark(graph, landmarks, args.benchmark)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from math import ceil
+
+
+def trigrams(name):
+    """
+    Returns the set of 3-character substrings of a lowercase name,
+    padded so that word starts and ends count as well.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy lookups over lowercase person names.
+
+    Prefix queries binary-search a sorted list of names. Fuzzy queries
+    count, per name, the query trigrams it shares by merging only the
+    rarest trigram -> name positions postings a good enough match must
+    appear in, then check the most promising candidates against the
+    rest, using each name's trigram count to bound its score.
+    """
+
+    def __init__(self, names):
+        """
+        `names` maps lowercase names to sets of person_ids,
+        like degrees.names.
+        """
+        self.ids = names
+        self.sorted_names = sorted(names)
+        postings = defaultdict(list)
+        sizes = array("H")
+        for position, name in enumerate(self.sorted_names):
+            name_trigrams = trigrams(name)
+            sizes.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                postings[trigram].append(position)
+        self.trigrams = {trigram: array("i", posting) for trigram, posting in postings.items()}
+        self.sizes = sizes
+
+    def dump(self):
+        """
+        Returns the index as plain lists, dicts and bytes, which
+        marshal can write, for load to rebuild it from.
+        """
+        return (
+            self.sorted_names,
+            {trigram: posting.tobytes() for trigram, posting in self.trigrams.items()},
+            self.sizes.tobytes(),
+        )
+
+    @classmethod
+    def load(cls, names, data):
+        """
+        Returns the index of `names` that dump returned `data` for,
+        without building it again.
+        """
+        index = cls.__new__(cls)
+        index.ids = names
+        index.sorted_names = data[0]
+        index.trigrams = {}
+        for trigram, posting in data[1].items():
+            positions = array("i")
+            positions.frombytes(posting)
+            index.trigrams[trigram] = positions
+        index.sizes = array("H")
+        index.sizes.frombytes(data[2])
+        return index
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.sorted_names, prefix)
+        while (i < len(self.sorted_names) and len(matches) < limit
+               and self.sorted_names[i].startswith(prefix)):
+            matches.append(self.sorted_names[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, query, limit=10, threshold=0.5):
+        """
+        Returns up to `limit` (score, name) pairs most similar to
+        `query`, best first, leaving out names scoring below
+        `threshold`. Score is the Jaccard similarity of the trigram
+        sets, from 0 to 1.
+        """
+        query_trigrams = trigrams(query.lower())
+        size = len(query_trigrams)
+        postings = sorted(
+            (self.trigrams[t] for t in query_trigrams if t in self.trigrams),
+            key=len
+        )
+
+        # A name scoring at least threshold shares at least `needed`
+        # trigrams with the query, since the score is at most shared /
+        # size. So it is in one of the rarest len(postings) - needed + 1
+        # postings, and only those are merged to find candidates.
+        needed = max(1, ceil(threshold * size))
+        split = len(postings) - needed + 1
+        if split <= 0:
+            return []
+        counts = Counter()
+        for posting in postings[:split]:
+            counts.update(posting)
+        rest = postings[split:]
+
+        best = []
+        for position, shared in counts.most_common():
+            # A name scores highest if it shares every trigram in rest,
+            # and candidates come in order of that bound
+            floor = best[0][0] if len(best) == limit else threshold
+            most = shared + len(rest)
+            if most < floor * size:
+                break
+            name_size = self.sizes[position]
+            most = min(most, name_size)
+            if most < floor * (size + name_size - most):
+                continue
+
+            for posting in rest:
+                i = bisect_left(posting, position)
+                if i < len(posting) and posting[i] == position:
+                    shared += 1
+            score = shared / (size + name_size - shared)
+            if score >= floor:
+                entry = (score, self.sorted_names[position])
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heappushpop(best, entry)
+        return sorted(best, reverse=True)
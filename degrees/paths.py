@@ -0,0 +1,163 @@
+import argparse
+import heapq
+import itertools
+import sys
+
+import degrees
+from degrees import iter_neighbors
+
+
+def shortest_path_dag(source, target):
+    """
+    Breadth-first search from source that records every predecessor
+    of each person, not just the first: preds[person] is a list of
+    (movie_id, person_id) steps one layer closer to the source.
+    Stops once the layer containing target is complete.
+
+    Returns preds, or None if target is not connected to source.
+    """
+    preds = {source: []}
+    layer = [source]
+    while layer and target not in preds:
+        next_preds = {}
+        for person_id in layer:
+            for movie_id, star_id in iter_neighbors(person_id, preds):
+                next_preds.setdefault(star_id, []).append((movie_id, person_id))
+        preds.update(next_preds)
+        layer = list(next_preds)
+    return preds if target in preds else None
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Lazily yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, at most `limit` of them.
+    """
+    preds = shortest_path_dag(source, target)
+    if preds is None:
+        return
+
+    def walk(person_id, suffix):
+        # Depth-first from the target back to the source through the DAG
+        if person_id == source:
+            yield list(reversed(suffix))
+            return
+        for movie_id, pred_id in preds[person_id]:
+            suffix.append((movie_id, person_id))
+            yield from walk(pred_id, suffix)
+            suffix.pop()
+
+    yield from itertools.islice(walk(target, []), limit)
+
+
+def _restricted_path(source, target, blocked_people, blocked_steps):
+    """
+    shortest_path that never visits `blocked_people` and never takes
+    a (person_id, movie_id, person_id) step in `blocked_steps`.
+    """
+    if source == target:
+        return []
+    parents = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, star_id in iter_neighbors(person_id, parents):
+                if (star_id in blocked_people
+                        or (person_id, movie_id, star_id) in blocked_steps):
+                    continue
+                parents[star_id] = (movie_id, person_id)
+                if star_id == target:
+                    path = []
+                    while parents[star_id] is not None:
+                        movie_id, parent_id = parents[star_id]
+                        path.append((movie_id, star_id))
+                        star_id = parent_id
+                    path.reverse()
+                    return path
+                next_layer.append(star_id)
+        layer = next_layer
+    return None
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Lazily yields up to `k` loopless connecting chains from the
+    source to the target in order of length (Yen's algorithm),
+    each as a list of (movie_id, person_id) pairs.
+    """
+    path = _restricted_path(source, target, set(), set())
+    if path is None:
+        return
+    found = []
+    candidates = []
+    seen = set()
+    counter = itertools.count()
+
+    while path is not None:
+        found.append(path)
+        yield path
+        if k is not None and len(found) >= k:
+            return
+
+        # Branch off the last path found at each of its people in turn
+        people = [source] + [person_id for _, person_id in path]
+        for i in range(len(path)):
+            root = path[:i]
+            spur_id = people[i]
+            blocked_steps = {
+                (spur_id, other[i][0], other[i][1])
+                for other in found if other[:i] == root and len(other) > i
+            }
+            spur = _restricted_path(spur_id, target, set(people[:i]), blocked_steps)
+            if spur is None:
+                continue
+            candidate = root + spur
+            key = tuple(candidate)
+            if key not in seen:
+                seen.add(key)
+                heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+        path = heapq.heappop(candidates)[2] if candidates else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="paths.py",
+        description="List several connecting chains between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--limit", type=int, default=10,
+                        help="most paths to print")
+    parser.add_argument("--k-shortest", action="store_true",
+                        help="list the k shortest chains, not only the shortest ones")
+    parser.add_argument("--pick", choices=list(degrees.PICK_POLICIES), default="most-movies")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    source = degrees.person_id_for_name(input("Name: "), args.pick)
+    target = degrees.person_id_for_name(input("Name: "), args.pick)
+    if source is None or target is None:
+        sys.exit("Person not found.")
+
+    if args.k_shortest:
+        paths = k_shortest_paths(source, target, args.limit)
+    else:
+        paths = all_shortest_paths(source, target, args.limit)
+    found = False
+    for n, path in enumerate(paths, 1):
+        found = True
+        chain = [degrees.people[source]["name"]]
+        for movie_id, person_id in path:
+            chain.append(f"[{degrees.movies[movie_id]['title']}]")
+            chain.append(degrees.people[person_id]["name"])
+        print(f"{n}: ({len(path)}) " + " ".join(chain))
+    if not found:
+        print("Not connected.")
+
+
+if __name__ == "__main__":
+    main()
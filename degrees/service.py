@@ -0,0 +1,207 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+def resolve(name, policy=None):
+    """
+    Returns the person_id for a name or IMDb id without prompting,
+    or raises LookupError if it is unknown, or ambiguous and no
+    pick policy is given.
+    """
+    if name in degrees.people:
+        return name
+    person_ids = degrees.names.get(name.lower(), set())
+    if not person_ids:
+        raise LookupError(f"person not found: {name}")
+    if len(person_ids) > 1:
+        if policy is not None:
+            return degrees.pick_person(person_ids, policy)
+        raise LookupError(f"ambiguous name: {name} ({', '.join(sorted(person_ids))})")
+    return next(iter(person_ids))
+
+
+def query(source_name, target_name, search=degrees.shortest_path, policy=None):
+    """
+    Answers one source/target query as a JSON-serializable dict.
+    """
+    result = {"source": source_name, "target": target_name}
+    try:
+        source = resolve(source_name, policy)
+        target = resolve(target_name, policy)
+    except LookupError as e:
+        result["error"] = str(e)
+        return result
+
+    path = search(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {
+                "movie_id": movie_id,
+                "movie": degrees.movies[movie_id]["title"],
+                "person_id": person_id,
+                "person": degrees.people[person_id]["name"],
+            }
+            for movie_id, person_id in path
+        ]
+    return result
+
+
+def run_batch(infile, outfile, search=degrees.shortest_path, policy=None):
+    """
+    Reads tab-separated name pairs from `infile`, one per line,
+    and writes one JSON result per line to `outfile`.
+    Throughput is reported on stderr.
+    """
+    count = 0
+    start_time = time.time()
+    for line in infile:
+        line = line.rstrip("\n")
+        if not line.strip():
+            continue
+        try:
+            source_name, target_name = line.split("\t")
+        except ValueError:
+            result = {"line": line, "error": "expected two tab-separated names"}
+        else:
+            result = query(source_name.strip(), target_name.strip(), search, policy)
+        outfile.write(json.dumps(result) + "\n")
+        count += 1
+    elapsed_time = time.time() - start_time
+    rate = count / elapsed_time if elapsed_time else float("inf")
+    print(f"{count} queries in {elapsed_time:.2f} seconds ({rate:.1f} queries/second)",
+          file=sys.stderr)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    GET /path?source=NAME&target=NAME answers a query,
+    GET /stats reports how many have been answered and how fast.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/path":
+            try:
+                source_name, = params["source"]
+                target_name, = params["target"]
+            except (KeyError, ValueError):
+                self.send_json(400, {"error": "expected one source and one target"})
+                return
+            start_time = time.time()
+            result = query(source_name, target_name, self.server.search,
+                           self.server.policy)
+            self.server.record(time.time() - start_time)
+            self.send_json(200, result)
+        elif url.path == "/stats":
+            self.send_json(200, self.server.stats())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryServer(ThreadingHTTPServer):
+    """
+    HTTP server that answers queries concurrently
+    against the data already loaded into degrees.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, search=degrees.shortest_path, policy=None):
+        super().__init__(address, QueryHandler)
+        self.search = search
+        self.policy = policy
+        self.started = time.time()
+        self.queries = 0
+        self.busy_time = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, elapsed_time):
+        with self.lock:
+            self.queries += 1
+            self.busy_time += elapsed_time
+
+    def stats(self):
+        with self.lock:
+            uptime = time.time() - self.started
+            return {
+                "queries": self.queries,
+                "uptime": uptime,
+                "queries_per_second": self.queries / uptime if uptime else 0.0,
+                "mean_latency": self.busy_time / self.queries if self.queries else None,
+            }
+
+
+def serve(address, search=degrees.shortest_path, policy=None):
+    """
+    Serves queries on (host, port) until interrupted.
+    """
+    with QueryServer(address, search, policy) as server:
+        host, port = server.server_address[:2]
+        print(f"Serving on http://{host}:{port}/path?source=...&target=...")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="service.py",
+        description="Answer many degrees queries with the data loaded once."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--batch", metavar="FILE",
+                      help="read tab-separated name pairs from FILE ('-' for stdin)")
+    mode.add_argument("--serve", metavar="[HOST:]PORT",
+                      help="answer queries over HTTP")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="reload the CSV files and refresh the snapshot")
+    parser.add_argument("--pick", choices=list(degrees.PICK_POLICIES),
+                        help="how to choose among people with the same name "
+                             "(default: report them as ambiguous)")
+    args = parser.parse_args()
+    search = (degrees.bidirectional_shortest_path if args.bidirectional
+              else degrees.shortest_path)
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, rebuild=args.rebuild)
+    print("Data loaded.", file=sys.stderr)
+
+    if args.batch is not None:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, search, args.pick)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, search, args.pick)
+    else:
+        host, _, port = args.serve.rpartition(":")
+        serve((host or "127.0.0.1", int(port)), search, args.pick)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import csv
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import logic
+import sat
+from logic import *
+
+BACKENDS = ("enumerate", "parallel", "bitmask", "sat", "kb")
+
+# Backends whose work grows with the number of models, 2 ** symbols
+ENUMERATING = ("enumerate", "parallel", "bitmask")
+
+# Result fields, in CSV column order
+FIELDS = ("label", "suite", "size", "backend", "symbols", "formula_nodes",
+          "queries", "entailed", "seconds", "peak_kib", "models",
+          "decisions", "conflicts")
+
+
+def knights_puzzle(n, rng):
+    """
+    Returns (knowledge, queries) for a random puzzle with n inhabitants,
+    each a knight or a knave, who each make one statement about
+    themselves or the others. Statements are drawn to fit a hidden
+    assignment, so the puzzle always has a solution, though not always
+    a unique one. The queries ask whether each inhabitant is a knight.
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(n)]
+    hidden = [rng.random() < 0.5 for _ in range(n)]
+
+    knowledge = []
+    for i in range(n):
+        knowledge.append(Or(knights[i], knaves[i]))
+        knowledge.append(Not(And(knights[i], knaves[i])))
+
+    for i in range(n):
+        x, y = rng.randrange(n), rng.randrange(n)
+        kind = rng.randrange(4)
+        if kind == 0:
+            # "X is a knave."
+            statement, truth = knaves[x], not hidden[x]
+        elif kind == 1:
+            # "X and Y are the same kind."
+            statement, truth = Biconditional(knights[x], knights[y]), hidden[x] == hidden[y]
+        elif kind == 2:
+            # "At least one of X and Y is a knave."
+            statement, truth = Or(knaves[x], knaves[y]), not (hidden[x] and hidden[y])
+        else:
+            # "If X is a knight, then so is Y."
+            statement, truth = Implication(knights[x], knights[y]), not hidden[x] or hidden[y]
+        if truth != hidden[i]:
+            statement = Not(statement)
+        knowledge.append(Biconditional(knights[i], statement))
+
+    return And(*knowledge), knights
+
+
+def random_3sat(n, ratio, rng, queries=4):
+    """
+    Returns (knowledge, queries) for a random 3-SAT formula over n
+    variables with round(ratio * n) clauses, and queries asking whether
+    it entails some of its variables.
+    """
+    variables = [Symbol(f"x{i}") for i in range(n)]
+    clauses = [
+        Or(*(variable if rng.random() < 0.5 else Not(variable)
+             for variable in rng.sample(variables, min(3, n))))
+        for _ in range(round(ratio * n))
+    ]
+    return And(*clauses), rng.sample(variables, min(queries, n))
+
+
+def count_solvers(solvers):
+    """
+    Makes sat create solvers that record themselves in `solvers`, and
+    returns the original class to restore afterwards.
+    """
+    Solver = sat.Solver
+
+    class CountingSolver(Solver):
+        def __init__(self):
+            super().__init__()
+            solvers.append(self)
+
+    sat.Solver = CountingSolver
+    return Solver
+
+
+def run_backend(backend, knowledge, queries):
+    """Answers every query with one backend, returning the answers."""
+    if backend == "kb":
+        kb = sat.KnowledgeBase(knowledge)
+        return [kb.entails(query) for query in queries]
+    return [logic.model_check(knowledge, query, method=backend) for query in queries]
+
+
+def measure(backend, knowledge, queries):
+    """
+    Runs a backend once for time and solver counts, then again under
+    tracemalloc for peak memory, which slows it down. Memory used by
+    the "parallel" backend's worker processes is not traced.
+    """
+    solvers = []
+    Solver = count_solvers(solvers)
+    try:
+        start_time = time.perf_counter()
+        answers = run_backend(backend, knowledge, queries)
+        elapsed_time = time.perf_counter() - start_time
+    finally:
+        sat.Solver = Solver
+
+    tracemalloc.start()
+    run_backend(backend, knowledge, queries)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return answers, {
+        "seconds": round(elapsed_time, 6),
+        "peak_kib": round(peak / 2 ** 10, 1),
+        "decisions": sum(solver.decisions for solver in solvers),
+        "conflicts": sum(solver.conflicts for solver in solvers),
+    }
+
+
+def benchmark(suite, sizes, make, backends, budget, max_models, label):
+    """
+    Runs every backend on an instance of each size in turn. A backend
+    that takes longer than `budget` seconds on one size is skipped for
+    the larger ones, as are enumerating backends once an instance has
+    more than `max_models` models. Returns a list of result dicts.
+    """
+    results = []
+    active = list(backends)
+    for size in sizes:
+        if not active:
+            break
+        knowledge, queries = make(size)
+        symbols = set.union(knowledge.symbols(), *(query.symbols() for query in queries))
+        formula_nodes = len(compile_sentence(knowledge, sorted(symbols)))
+        models = 1 << len(symbols)
+        if models > max_models:
+            active = [backend for backend in active if backend not in ENUMERATING]
+
+        expected = None
+        for backend in list(active):
+            answers, row = measure(backend, knowledge, queries)
+            if expected is None:
+                expected = answers
+            elif answers != expected:
+                sys.exit(f"{backend} disagrees on {suite} size {size}.")
+
+            row.update(
+                label=label, suite=suite, size=size, backend=backend,
+                symbols=len(symbols), formula_nodes=formula_nodes,
+                queries=len(queries), entailed=sum(answers),
+                # Models the enumerating backends may visit per query
+                models=models if backend in ENUMERATING else 0,
+            )
+            results.append(row)
+            print(f"{suite:8} {size:4}  {backend:9} {row['seconds']:9.4f} s "
+                  f"{row['peak_kib']:10.1f} KiB  {row['models'] or row['decisions']:>10}")
+            if row["seconds"] > budget:
+                active.remove(backend)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="benchmark.py",
+        description="Time the entailment backends on growing knights puzzles and random 3-SAT."
+    )
+    parser.add_argument("--suite", choices=("knights", "3sat", "all"), default="all")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(range(2, 13)),
+                        help="knights puzzle inhabitant counts")
+    parser.add_argument("--sat-sizes", nargs="+", type=int,
+                        default=[5, 10, 15, 20, 25, 30, 40, 60, 80, 100],
+                        help="3-SAT variable counts")
+    parser.add_argument("--ratio", type=float, default=4.26,
+                        help="3-SAT clauses per variable")
+    parser.add_argument("--budget", type=float, default=5.0,
+                        help="seconds after which a backend stops growing")
+    parser.add_argument("--max-models", type=int, default=1 << 26,
+                        help="largest model count to enumerate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="",
+                        help="tag stored with every result, e.g. a version")
+    parser.add_argument("--json", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--csv", metavar="FILE", help="write results as CSV")
+    args = parser.parse_args()
+
+    print(f"{'suite':8} {'size':>4}  {'backend':9} {'time':>11} {'peak memory':>14}  "
+          f"{'models/decisions':>10}")
+    results = []
+    if args.suite in ("knights", "all"):
+        results += benchmark(
+            "knights", args.sizes,
+            lambda n: knights_puzzle(n, random.Random(args.seed + n)),
+            args.backends, args.budget, args.max_models, args.label
+        )
+    if args.suite in ("3sat", "all"):
+        results += benchmark(
+            "3sat", args.sat_sizes,
+            lambda n: random_3sat(n, args.ratio, random.Random(args.seed + n)),
+            args.backends, args.budget, args.max_models, args.label
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "label": args.label,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            }, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import re
+import sys
+import time
+from array import array
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+from sat import KnowledgeBase, Solver
+
+# Connectives as written by Sentence.formula(), plus ASCII spellings
+NOT = {"¬", "~", "!"}
+AND = {"∧", "&"}
+OR = {"∨", "|"}
+
+# A token is a connective, a parenthesis or a symbol name, which may
+# contain spaces ("A is a Knight") but no connective characters
+TOKEN = re.compile(r"\s*(?:<=>|=>|[¬~!∧&∨|()]|[^¬~!∧&∨|()<=]+)")
+
+
+def tokenize(text):
+    text = text.rstrip()
+    tokens = TOKEN.findall(text)
+    if sum(map(len, tokens)) != len(text):
+        raise ValueError(f"unexpected character in {text!r}")
+    return [token.strip() for token in tokens if not token.isspace()]
+
+
+class Parser():
+    """
+    Recursive-descent parser for the formula syntax produced by
+    Sentence.formula(). Binding is tightest first: ¬, ∧, ∨, =>, <=>,
+    with => grouping to the right.
+
+    `symbols` caches Symbol objects by name, and may be shared
+    between parsers reading the same knowledge base.
+    """
+
+    def __init__(self, text, symbols=None):
+        # None marks the end of input, so peek needs no bounds check
+        self.tokens = tokenize(text) + [None]
+        self.position = 0
+        self.symbols = {} if symbols is None else symbols
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def take(self):
+        token = self.tokens[self.position]
+        if token is None:
+            raise ValueError("unexpected end of formula")
+        self.position += 1
+        return token
+
+    def parse(self):
+        sentence = self.biconditional()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected {self.peek()!r}")
+        return sentence
+
+    def biconditional(self):
+        left = self.implication()
+        while self.peek() == "<=>":
+            self.take()
+            left = Biconditional(left, self.implication())
+        return left
+
+    def implication(self):
+        antecedent = self.disjunction()
+        if self.peek() == "=>":
+            self.take()
+            return Implication(antecedent, self.implication())
+        return antecedent
+
+    def disjunction(self):
+        disjuncts = [self.conjunction()]
+        while self.peek() in OR:
+            self.take()
+            disjuncts.append(self.conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction(self):
+        conjuncts = [self.negation()]
+        while self.peek() in AND:
+            self.take()
+            conjuncts.append(self.negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation(self):
+        if self.peek() in NOT:
+            self.take()
+            return Not(self.negation())
+        token = self.take()
+        if token == "(":
+            sentence = self.biconditional()
+            if self.take() != ")":
+                raise ValueError("expected ')'")
+            return sentence
+        symbol = self.symbols.get(token)
+        if symbol is None:
+            if token in {")", "<=>", "=>"} or token in AND or token in OR:
+                raise ValueError(f"unexpected {token!r}")
+            symbol = self.symbols[token] = Symbol(token)
+        return symbol
+
+
+def parse(text, symbols=None):
+    """Returns the Sentence written as `text` in formula syntax."""
+    return Parser(text, symbols).parse()
+
+
+def load_formulas(filename):
+    """
+    Lazily yields one Sentence per non-empty line of a formula file,
+    skipping lines starting with '#'.
+    """
+    symbols = {}
+    with open(filename, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield parse(line, symbols)
+            except ValueError as e:
+                raise ValueError(f"{filename}:{number}: {e}") from None
+
+
+class Clauses():
+    """
+    Clauses stored flat, as in DIMACS: the literals of every clause
+    in one int array, each clause ended by a 0.
+    """
+
+    def __init__(self, num_vars=0):
+        self.num_vars = num_vars
+        self.literals = array("i")
+
+    def __len__(self):
+        return self.literals.count(0)
+
+    def __iter__(self):
+        clause = []
+        for literal in self.literals:
+            if literal:
+                clause.append(literal)
+            else:
+                yield clause
+                clause = []
+
+    def solver(self):
+        """Returns a Solver loaded with these clauses."""
+        solver = Solver()
+        for clause in self:
+            solver.add_clause(clause)
+        return solver
+
+    def sentences(self):
+        """Yields each clause as an Or of symbols named x1, x2, ..."""
+        for clause in self:
+            yield Or(*[Symbol(f"x{literal}") if literal > 0 else Not(Symbol(f"x{-literal}"))
+                       for literal in clause])
+
+
+def load_dimacs(filename):
+    """Reads a DIMACS CNF file into a Clauses object, line by line."""
+    clauses = Clauses()
+    literals = clauses.literals
+    with open(filename) as f:
+        for line in f:
+            if not line or line[0] in "c\n":
+                continue
+            if line[0] == "p":
+                _, _, num_vars, _ = line.split()
+                clauses.num_vars = int(num_vars)
+            elif line[0] == "%":
+                break
+            else:
+                literals.extend(map(int, line.split()))
+    if literals and literals[-1] != 0:
+        literals.append(0)
+    return clauses
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="loader.py",
+        description="Load a formula or DIMACS CNF file and check it."
+    )
+    parser.add_argument("filename")
+    parser.add_argument("--query", action="append", default=[],
+                        help="formula to check for entailment (repeatable)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if args.filename.endswith(".cnf"):
+        clauses = load_dimacs(args.filename)
+        print(f"Loaded {len(clauses)} clauses over {clauses.num_vars} variables "
+              f"in {time.time() - start_time:.2f} seconds")
+        start_time = time.time()
+        satisfiable = clauses.solver().solve()
+        print(f"{'Satisfiable' if satisfiable else 'Unsatisfiable'} "
+              f"({time.time() - start_time:.2f} seconds)")
+        if args.query:
+            sys.exit("--query needs a formula file")
+        return
+
+    kb = KnowledgeBase()
+    count = 0
+    for sentence in load_formulas(args.filename):
+        kb.add(sentence)
+        count += 1
+    print(f"Loaded {count} sentences in {time.time() - start_time:.2f} seconds")
+    for query in args.query:
+        print(f"{query}: {'entailed' if kb.entails(parse(query)) else 'not entailed'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,68 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Base class of logical sentences.
+
+    Sentences are immutable and hash-consed: constructing a sentence
+    structurally equal to one that already exists returns the existing
+    object, so repeated subformulas share memory. The exception is And,
+    which add can grow in place, so every And is a new object. Each
+    node caches its symbol set on first use, and its hash when built
+    (an And on first use, again after each add).
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Maps (class, *fields) to the live sentence with those fields
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def _build(cls, fields, hash_key):
+        sentence = object.__new__(cls)
+        for name, value in zip(cls.__slots__, fields):
+            object.__setattr__(sentence, name, value)
+        object.__setattr__(sentence, "_hash", None if hash_key is None else hash(hash_key))
+        object.__setattr__(sentence, "_symbols", None)
+        return sentence
+
+    @classmethod
+    def _intern(cls, fields, hash_key):
+        key = (cls, *fields)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = cls._build(fields, hash_key)
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __eq__(self, other):
+        # Interned sentences are equal exactly when identical; And
+        # sentences are not interned, so compare fields too
+        return self is other or (type(other) is type(self)
+                                 and self._fields() == other._fields())
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self._fields())
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in type(self).__slots__)
+
+    def _symbol_set(self):
+        """Returns the cached frozenset of symbol names, building it once."""
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", self._compute_symbols())
+        return self._symbols
+
+    def _compute_symbols(self):
+        return frozenset()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +74,7 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self._symbol_set())
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +104,10 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls._intern((name,), ("symbol", name))
 
     def __repr__(self):
         return self.name
@@ -65,20 +121,16 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def _compute_symbols(self):
+        return frozenset([self.name])
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
-
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls._intern((operand,), ("not", hash(operand)))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +141,30 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def _compute_symbols(self):
+        return self.operand._symbol_set()
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        # Not interned: add changes a sentence in place, which must not
+        # change other sentences that happen to be equal to it. The
+        # hash is computed on first use, so add stays a list append.
+        return cls._build((list(conjuncts),), None)
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            ))
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), tuple(self.conjuncts))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +173,15 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """
+        Appends a conjunct in place, for building a knowledge base up
+        step by step. The sentence should not be added to once it is
+        part of another sentence, whose cached hash would go stale.
+        """
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_symbols", None)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,24 +192,24 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def _compute_symbols(self):
+        return frozenset().union(*[conjunct._symbol_set() for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        return cls._intern(
+            (disjuncts,),
+            ("or", tuple(hash(disjunct) for disjunct in disjuncts))
         )
 
+    def __reduce__(self):
+        return (type(self), self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -157,24 +223,20 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def _compute_symbols(self):
+        return frozenset().union(*[disjunct._symbol_set() for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return cls._intern(
+            (antecedent, consequent),
+            ("implies", hash(antecedent), hash(consequent))
+        )
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +250,20 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def _compute_symbols(self):
+        return self.antecedent._symbol_set() | self.consequent._symbol_set()
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return cls._intern(
+            (left, right),
+            ("biconditional", hash(left), hash(right))
+        )
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,47 +275,209 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+    def _compute_symbols(self):
+        return self.left._symbol_set() | self.right._symbol_set()
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    method "enumerate" walks every model in turn, "parallel" splits the
+    models across processes (see parallel_check), "bitmask" checks all
+    models at once with bit-parallel NumPy evaluation (see
+    bitmask_check), and "sat" asks a SAT solver (see sat.sat_check).
+    """
+    if method == "parallel":
+        return parallel_check(knowledge, query)
+    elif method == "bitmask":
+        return bitmask_check(knowledge, query)
+    elif method == "sat":
+        from sat import sat_check
+        return sat_check(knowledge, query)
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method: {method}")
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return check_models(knowledge, query, symbols, dict())
+
+
+def check_models(knowledge, query, symbols, fixed):
+    """
+    Checks that query holds in every model of knowledge that extends
+    the assignment `fixed` with some assignment of `symbols`.
+
+    Model m assigns the symbols the bits of m's Gray code, so each
+    step flips exactly one symbol of a single model dict in place.
+    """
+    model = dict(fixed)
+    for name in symbols:
+        model[name] = False
+
+    for m in range(1 << len(symbols)):
+        if m:
+            # Gray code m differs from m - 1 at m's lowest set bit
+            name = symbols[(m & -m).bit_length() - 1]
+            model[name] = not model[name]
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge.evaluate(model) and not query.evaluate(model):
+            return False
+    return True
+
+
+# Arguments shared by parallel_check workers, set once per process
+_parallel_job = None
+
+
+def _init_parallel_worker(knowledge, query, symbols):
+    global _parallel_job
+    _parallel_job = (knowledge, query, symbols)
+
+
+def _check_prefix(fixed):
+    knowledge, query, symbols = _parallel_job
+    return check_models(knowledge, query, symbols, fixed)
+
+
+def parallel_check(knowledge, query, split=None, processes=None):
+    """
+    Checks if knowledge base entails query like model_check, with the
+    models split on every assignment of the first `split` symbols and
+    each part checked in a process pool. The pool is terminated as
+    soon as any part finds a counterexample.
+    """
+    import os
+    from multiprocessing import Pool
+
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    if split is None:
+        # About four parts per process, for balance
+        workers = processes or os.cpu_count() or 1
+        split = (4 * workers - 1).bit_length()
+    split = min(split, len(symbols))
+    prefix, rest = symbols[:split], symbols[split:]
+
+    parts = (
+        {name: bool(m >> i & 1) for i, name in enumerate(prefix)}
+        for m in range(1 << split)
+    )
+    with Pool(processes, initializer=_init_parallel_worker,
+              initargs=(knowledge, query, rest)) as pool:
+        for entailed in pool.imap_unordered(_check_prefix, parts):
+            if not entailed:
+                return False
+    return True
+
+
+# Bit m of a 64-bit word is set iff bit i of m is, for i < 6
+_LOW_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+]
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Flattens a sentence into a list of instructions, children before
+    parents and each distinct subformula once. Each instruction is
+    (op, args), where args index earlier instructions, or for "symbol"
+    give the symbol's position in `symbols`. The last instruction
+    computes the sentence itself.
+    """
+    positions = {name: i for i, name in enumerate(symbols)}
+    program = []
+    registers = {}
+    stack = [(sentence, False)]
+    while stack:
+        node, ready = stack.pop()
+        if node in registers:
+            continue
+        if isinstance(node, Symbol):
+            registers[node] = len(program)
+            program.append(("symbol", positions[node.name]))
+            continue
+        if isinstance(node, Not):
+            op, children = "not", [node.operand]
+        elif isinstance(node, And):
+            op, children = "and", node.conjuncts
+        elif isinstance(node, Or):
+            op, children = "or", node.disjuncts
+        elif isinstance(node, Implication):
+            op, children = "implies", [node.antecedent, node.consequent]
+        elif isinstance(node, Biconditional):
+            op, children = "biconditional", [node.left, node.right]
+        else:
+            raise TypeError(f"cannot compile {node!r}")
+        if ready:
+            registers[node] = len(program)
+            program.append((op, [registers[child] for child in children]))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children))
+    return program
+
+
+def bitmask_check(knowledge, query, chunk_words=1 << 16):
+    """
+    Checks if knowledge base entails query by evaluating both in every
+    model at once. Model m assigns symbol i the value of bit i of m,
+    and each sentence evaluates to a packed bitmask over the models, 64
+    per uint64 word, so And/Or/Not become bitwise operations. Models are
+    processed `chunk_words` words at a time, stopping at the first chunk
+    with a counterexample.
+    """
+    import numpy as np
+
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    program = compile_sentence(And(knowledge, Not(query)), symbols)
+    ones = np.uint64(0xFFFFFFFFFFFFFFFF)
+    num_models = 1 << len(symbols)
+    num_words = max(1, num_models >> 6)
+
+    for start in range(0, num_words, chunk_words):
+        words = np.arange(start, min(start + chunk_words, num_words), dtype=np.uint64)
+
+        registers = []
+        for op, args in program:
+            if op == "symbol":
+                if args < 6:
+                    value = np.full(len(words), _LOW_PATTERNS[args], dtype=np.uint64)
+                else:
+                    bit = (words >> np.uint64(args - 6)) & np.uint64(1)
+                    value = bit * ones
+            elif op == "not":
+                value = ~registers[args[0]]
+            elif op == "and":
+                value = np.full(len(words), ones, dtype=np.uint64)
+                for arg in args:
+                    value = value & registers[arg]
+            elif op == "or":
+                value = np.zeros(len(words), dtype=np.uint64)
+                for arg in args:
+                    value = value | registers[arg]
+            elif op == "implies":
+                value = ~registers[args[0]] | registers[args[1]]
+            else:
+                value = ~(registers[args[0]] ^ registers[args[1]])
+            registers.append(value)
+
+        # Models where knowledge holds and query does not
+        counterexamples = registers[-1]
+        if num_models < 64:
+            counterexamples = counterexamples & np.uint64((1 << num_models) - 1)
+        if counterexamples.any():
+            return False
+
+    return True
@@ -0,0 +1,492 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+
+class CNF():
+    """
+    Tseitin encoding of logical sentences into conjunctive normal form.
+
+    Variables are positive ints and a literal is a variable or its
+    negation. Every compound subformula gets a fresh variable that is
+    constrained to equal it, so the clauses grow linearly with the
+    sentence instead of exponentially. Equal subformulas share one
+    variable.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.variables = {}
+        self.names = {}
+        self.clauses = []
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the variable of the symbol called `name`."""
+        if name not in self.variables:
+            self.num_vars += 1
+            self.variables[name] = self.num_vars
+            self.names[self.num_vars] = name
+        return self.variables[name]
+
+    def fresh(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when `sentence` is,
+        adding the clauses that define it.
+        """
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, Symbol):
+            literal = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            literal = -self.literal(sentence.operand)
+        elif isinstance(sentence, And):
+            children = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            literal = self.fresh()
+            for child in children:
+                self.clauses.append([-literal, child])
+            self.clauses.append([literal] + [-child for child in children])
+        elif isinstance(sentence, Or):
+            children = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            literal = self.fresh()
+            for child in children:
+                self.clauses.append([literal, -child])
+            self.clauses.append([-literal] + children)
+        elif isinstance(sentence, Implication):
+            antecedent = self.literal(sentence.antecedent)
+            consequent = self.literal(sentence.consequent)
+            literal = self.fresh()
+            self.clauses.append([literal, antecedent])
+            self.clauses.append([literal, -consequent])
+            self.clauses.append([-literal, -antecedent, consequent])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            literal = self.fresh()
+            self.clauses.append([-literal, -left, right])
+            self.clauses.append([-literal, left, -right])
+            self.clauses.append([literal, left, right])
+            self.clauses.append([literal, -left, -right])
+        else:
+            raise TypeError(f"cannot encode {sentence!r}")
+
+        self.literals[sentence] = literal
+        return literal
+
+    def add(self, sentence):
+        """
+        Adds clauses asserting that `sentence` is true. Clauses already
+        in clausal form are added as they are; only their compound
+        parts get Tseitin variables.
+        """
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, And):
+            self.clauses.append([-self.literal(conjunct)
+                                 for conjunct in sentence.operand.conjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+def luby(i):
+    """Returns the i-th term (from 1) of the Luby sequence 1 1 2 1 1 2 4 ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Solver():
+    """
+    CDCL satisfiability solver over integer-literal clauses. It runs
+    unit propagation on two watched literals per clause, learns a
+    clause from each conflict (first unique implication point) and
+    backjumps non-chronologically, and restarts on the Luby sequence.
+    It branches on the most active variable (VSIDS), starting from
+    occurrence counts, with the value the variable last had, or at
+    first the sign it occurs with most. Clauses may be added between
+    calls to solve. Learned clauses are kept across calls, but the
+    longer half is dropped every so often.
+
+    self.decisions and self.conflicts count branching decisions and
+    conflicts over all calls to solve.
+    """
+
+    # Conflicts per unit of the Luby restart sequence
+    RESTART = 100
+    # Activity decay per conflict
+    DECAY = 0.95
+    # Conflicts before learned clauses are first thinned out, and how
+    # much longer each following round waits
+    REDUCE = 2000
+    REDUCE_STEP = 300
+
+    def __init__(self):
+        self.clauses = []
+        self.learned = []
+        self.reductions = 0
+        self.reduce_at = self.REDUCE
+        self.units = []
+        self.watches = {}
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [None]
+        self.polarity = [0]
+        self.activity = [0.0]
+        self.increment = 1.0
+        self.heap = []
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+        self.decisions = 0
+        self.conflicts = 0
+
+    def ensure(self, var):
+        while len(self.values) <= var:
+            self.values.append(0)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.phases.append(None)
+            self.polarity.append(0)
+            self.activity.append(0.0)
+
+    def value(self, literal):
+        """1 if literal is true, -1 if false, 0 if unassigned."""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, clause):
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        for literal in clause:
+            var = abs(literal)
+            self.ensure(var)
+            self.activity[var] += 1
+            self.polarity[var] += 1 if literal > 0 else -1
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def assign(self, literal, reason=None):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def backtrack(self, level):
+        """Unassigns everything above decision level `level`."""
+        if len(self.trail_lim) <= level:
+            return
+        size = self.trail_lim[level]
+        for literal in self.trail[size:]:
+            var = abs(literal)
+            self.values[var] = 0
+            self.reasons[var] = None
+            self.phases[var] = literal > 0
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[size:]
+        del self.trail_lim[level:]
+        self.head = min(self.head, size)
+
+    def reset(self):
+        """Unassigns every variable, level 0 included."""
+        for literal in self.trail:
+            var = abs(literal)
+            self.values[var] = 0
+            self.reasons[var] = None
+            self.phases[var] = literal > 0
+        self.trail = []
+        self.trail_lim = []
+        self.head = 0
+        self.heap = [(-self.activity[var], var) for var in range(1, len(self.values))]
+        heapq.heapify(self.heap)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with one unassigned
+        literal left. Returns the index of a clause with every literal
+        false, or None if there is no conflict.
+        """
+        values = self.values
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches.get(false_literal, [])
+            kept = []
+            for n, index in enumerate(watchers):
+                clause = self.clauses[index]
+                if clause is None:
+                    # Deleted by reduce; drop the watch
+                    continue
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                # Satisfied by the other watch
+                first = clause[0]
+                value = values[abs(first)]
+                if (value if first > 0 else -value) == 1:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal to watch instead
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[abs(literal)]
+                    if (value if literal > 0 else -value) != -1:
+                        clause[1], clause[k] = literal, clause[1]
+                        self.watches.setdefault(literal, []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    value = values[abs(first)]
+                    if (value if first > 0 else -value) == -1:
+                        kept.extend(watchers[n + 1:])
+                        self.watches[false_literal] = kept
+                        return index
+                    self.assign(first, index)
+            self.watches[false_literal] = kept
+        return None
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            # Rescale before overflow; heap entries go stale, so rebuild
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[var], var) for var in range(1, len(self.values))
+                         if not self.values[var]]
+            heapq.heapify(self.heap)
+
+    def analyze(self, index):
+        """
+        Returns the clause learned from conflict clause `index`, with
+        the literal it asserts first and a literal from the level to
+        backjump to second, and that level.
+        """
+        level = len(self.trail_lim)
+        seen = set()
+        learned = [None]
+        pending = 0
+        position = len(self.trail) - 1
+        while True:
+            for literal in self.clauses[index]:
+                var = abs(literal)
+                if var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.levels[var] == level:
+                    pending += 1
+                else:
+                    learned.append(literal)
+
+            # Resolve on the latest assigned literal of this level
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if not pending:
+                break
+            index = self.reasons[abs(literal)]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def reduce(self):
+        """
+        Deletes the longer half of the learned clauses. Only called at
+        decision level 0, where no learned clause is needed as a reason.
+        """
+        self.learned.sort(key=lambda index: len(self.clauses[index]))
+        keep = len(self.learned) // 2
+        for index in self.learned[keep:]:
+            self.clauses[index] = None
+        del self.learned[keep:]
+        self.reductions += 1
+        self.reduce_at = self.conflicts + self.REDUCE + self.REDUCE_STEP * self.reductions
+
+    def pick(self):
+        """Returns the most active unassigned variable, or None."""
+        while self.heap:
+            activity, var = heapq.heappop(self.heap)
+            if not self.values[var] and -activity == self.activity[var]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, together with the `assumptions`
+        literals, are satisfiable; the satisfying assignment is then in
+        self.model as a dict of variable -> bool.
+        """
+        self.model = None
+        assumptions = list(assumptions)
+        for literal in assumptions:
+            self.ensure(abs(literal))
+        self.reset()
+        if not self.ok:
+            return False
+        for literal in self.units:
+            value = self.value(literal)
+            if value == -1:
+                self.ok = False
+                return False
+            if value == 0:
+                self.assign(literal)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restarts = 1
+        budget = self.RESTART * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    # A conflict that assumes nothing holds for good
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.units.append(learned[0])
+                    self.assign(learned[0])
+                else:
+                    index = self.watch(learned)
+                    self.learned.append(index)
+                    self.assign(learned[0], index)
+                self.increment /= self.DECAY
+                budget -= 1
+                continue
+
+            if budget <= 0:
+                restarts += 1
+                budget = self.RESTART * luby(restarts)
+                self.backtrack(0)
+                if self.conflicts >= self.reduce_at:
+                    self.reduce()
+                continue
+
+            # Assumptions take the first decision levels, one each
+            if len(self.trail_lim) < len(assumptions):
+                literal = assumptions[len(self.trail_lim)]
+                value = self.value(literal)
+                if value == -1:
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal)
+                continue
+
+            var = self.pick()
+            if var is None:
+                self.model = {var: self.values[var] == 1
+                              for var in range(1, len(self.values))}
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            phase = self.phases[var]
+            if phase is None:
+                phase = self.polarity[var] >= 0
+            self.assign(var if phase else -var)
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that
+    knowledge ∧ ¬query has no model. Same result as model_check.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.clauses.append([-cnf.literal(query)])
+    solver = Solver()
+    for clause in cnf.clauses:
+        solver.add_clause(clause)
+    return not solver.solve()
+
+
+class KnowledgeBase():
+    """
+    Knowledge compiled once into a SAT solver, answering many
+    entailment queries against it.
+
+    Each query is a single solver call that assumes the query is false,
+    so nothing about the knowledge is re-encoded, and adding a sentence
+    only appends its clauses. Models found along the way are kept until
+    the next add, and refute later queries they falsify without
+    another solver call.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.synced = 0
+        self.models = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.cnf.add(sentence)
+        self.sync()
+        self.models = []
+
+    def sync(self):
+        """Passes clauses the encoder added since last time to the solver."""
+        for clause in self.cnf.clauses[self.synced:]:
+            self.solver.add_clause(clause)
+        self.synced = len(self.cnf.clauses)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        symbols = query.symbols()
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                return False
+
+        # Defining clauses for the query's own subformulas are safe to
+        # keep: they only constrain its fresh variables
+        literal = self.cnf.literal(query)
+        self.sync()
+        if not self.solver.solve([-literal]):
+            return True
+        self.models.append({
+            name: self.solver.model.get(var, False)
+            for name, var in self.cnf.variables.items()
+        })
+        return False
@@ -0,0 +1,11 @@
+from loader import parse
+from puzzle import knowledge0, knowledge1, knowledge2, knowledge3
+
+puzzles = [knowledge0, knowledge1, knowledge2, knowledge3]
+for i, knowledge in enumerate(puzzles):
+    formula = knowledge.formula()
+    parsed = parse(formula)
+    print(f"Puzzle {i}: {'ok' if parsed == knowledge else 'MISMATCH'}")
+    if parsed != knowledge:
+        print(f"    {formula}")
+        print(f"    {parsed.formula()}")
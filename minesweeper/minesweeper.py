@@ -1,5 +1,7 @@
 import itertools
 import random
+from collections import deque
+from math import comb
 
 
 class Minesweeper():
@@ -98,6 +100,11 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # Hashed by value, so a sentence must leave any set it is in
+        # before its cells or count change
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -143,17 +150,144 @@ class Sentence():
         return not self.cells and not self.count
 
 
+def convolve(a, b):
+    """
+    Multiplies two polynomials given as coefficient lists. Here
+    coefficient m counts the ways of placing exactly m mines.
+    """
+    product = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                product[i + j] += x * y
+    return product
+
+
+def add_polynomials(a, b):
+    """Adds two polynomials given as coefficient lists."""
+    if len(a) < len(b):
+        a, b = b, a
+    return [x + (b[i] if i < len(b) else 0) for i, x in enumerate(a)]
+
+
+def count_component(cells, sentences):
+    """
+    Counts the mine assignments to `cells` that satisfy every sentence
+    in `sentences`, whose cells must all be among `cells`.
+
+    Returns (total, per_cell). total[m] is the number of assignments
+    with exactly m mines. per_cell[cell][m] is the number of those in
+    which cell is a mine.
+
+    Cells are assigned one at a time, in breadth-first order so that
+    sentences close soon after they open. At each step the rest of the
+    search depends only on how many mines each open sentence still
+    needs. The backtracking is therefore memoized on those counts: a
+    forward pass counts the ways to reach each state, and a backward
+    pass counts the ways to finish from it.
+    """
+    sentences = list(sentences)
+    by_cell = {cell: [] for cell in cells}
+    for k, sentence in enumerate(sentences):
+        for cell in sentence.cells:
+            by_cell[cell].append(k)
+
+    # Breadth-first order over cells that share a sentence
+    order = []
+    seen = set()
+    for root in cells:
+        if root in seen:
+            continue
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for k in by_cell[cell]:
+                for neighbor in sentences[k].cells:
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+    position = {cell: i for i, cell in enumerate(order)}
+    n = len(order)
+
+    first = [min(position[cell] for cell in sentence.cells) for sentence in sentences]
+    last = [max(position[cell] for cell in sentence.cells) for sentence in sentences]
+
+    # open_at[i]: sentences with cells both before position i and at or after it
+    open_at = [[k for k in range(len(sentences)) if first[k] < i <= last[k]]
+               for i in range(n + 1)]
+
+    # left[i][k]: cells of sentence k after position i
+    left = []
+    for i, cell in enumerate(order):
+        left.append({k: sum(1 for other in sentences[k].cells if position[other] > i)
+                     for k in by_cell[cell]})
+
+    def step(i, state, mine):
+        """The state after position i, or None if no assignment fits."""
+        needed = dict(zip(open_at[i], state))
+        for k in by_cell[order[i]]:
+            remaining = needed.get(k, sentences[k].count) - mine
+            if not 0 <= remaining <= left[i][k]:
+                return None
+            needed[k] = remaining
+        return tuple(needed[k] for k in open_at[i + 1])
+
+    # Forward: ways to reach each state, by mines placed so far
+    forward = [{(): [1]}]
+    for i in range(n):
+        layer = {}
+        for state, ways in forward[i].items():
+            for mine in (0, 1):
+                following = step(i, state, mine)
+                if following is not None:
+                    layer[following] = add_polynomials(
+                        layer.get(following, [0]), [0] * mine + ways
+                    )
+        forward.append(layer)
+
+    # Backward: ways to finish from each state, by mines still to place
+    backward = [None] * n + [{(): [1]}]
+    for i in range(n - 1, -1, -1):
+        layer = {}
+        for state in forward[i]:
+            ways = [0]
+            for mine in (0, 1):
+                following = step(i, state, mine)
+                if following in backward[i + 1]:
+                    ways = add_polynomials(ways, [0] * mine + backward[i + 1][following])
+            layer[state] = ways
+        backward[i] = layer
+
+    total = backward[0][()] if n else [1]
+    per_cell = {}
+    for i, cell in enumerate(order):
+        mines = [0]
+        for state, ways in forward[i].items():
+            following = step(i, state, 1)
+            if following in backward[i + 1]:
+                mines = add_polynomials(
+                    mines, convolve(ways, [0] + backward[i + 1][following])
+                )
+        per_cell[cell] = mines
+    return total, per_cell
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -161,8 +295,43 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Set of sentences about the game known to be true, each kept once
+        self.knowledge = set()
+
+        # Sentences mentioning each cell
+        self.cell_sentences = {}
+
+        # Sentences added or changed since inference last looked at them
+        self.pending = deque()
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it is empty or
+        already known, and queues it for inference.
+        """
+        if not sentence.cells or sentence in self.knowledge:
+            return
+        self.knowledge.add(sentence)
+        for cell in sentence.cells:
+            self.cell_sentences.setdefault(cell, set()).add(sentence)
+        self.pending.append(sentence)
+
+    def remove_sentence(self, sentence):
+        self.knowledge.discard(sentence)
+        for cell in sentence.cells:
+            self.cell_sentences[cell].discard(sentence)
+
+    def update_sentences(self, cell, mark):
+        """
+        Applies `mark` (Sentence.mark_mine or Sentence.mark_safe) to
+        every sentence mentioning cell. Sentences are hashed by value,
+        so each is taken out of the knowledge base while it changes.
+        """
+        for sentence in list(self.cell_sentences.get(cell, ())):
+            self.remove_sentence(sentence)
+            mark(sentence, cell)
+            self.add_sentence(sentence)
+        self.cell_sentences.pop(cell, None)
 
     def mark_mine(self, cell):
         """
@@ -170,8 +339,7 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.update_sentences(cell, Sentence.mark_mine)
 
     def mark_safe(self, cell):
         """
@@ -179,8 +347,44 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.update_sentences(cell, Sentence.mark_safe)
+
+    def infer(self):
+        """
+        Draws every conclusion that follows from the pending sentences,
+        until none are left.
+
+        A pending sentence either settles its cells as all mines or all
+        safe, or is compared with the sentences it shares a cell with,
+        which are the only ones it can be a subset or superset of.
+        Whatever changes or gets inferred is queued in turn, so the work
+        stays near the cells that changed.
+        """
+        while self.pending:
+            sentence = self.pending.popleft()
+            if sentence not in self.knowledge:
+                continue
+
+            mines = sentence.known_mines().copy()
+            safes = sentence.known_safes().copy()
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+            if mines or safes:
+                continue
+
+            others = set()
+            for cell in sentence.cells:
+                others |= self.cell_sentences[cell]
+            others.discard(sentence)
+            for other in others:
+                if sentence.cells < other.cells:
+                    self.add_sentence(Sentence(other.cells - sentence.cells,
+                                               other.count - sentence.count))
+                elif other.cells < sentence.cells:
+                    self.add_sentence(Sentence(sentence.cells - other.cells,
+                                               sentence.count - other.count))
 
     def add_knowledge(self, cell, count):
 
@@ -215,50 +419,17 @@ class MinesweeperAI():
                 if (i, j) == cell:
                     continue
 
-                # Add to neighbors if cell in bounds and is not revealed
-                if 0 <= i < self.height and 0 <= j < self.width and not (i, j) in self.moves_made:
-                    neighbor_cells.add((i, j))
-        if neighbor_cells:
-            self.knowledge.append(Sentence(neighbor_cells, count))
+                # Known mines only lower the count, known safes drop out
+                if 0 <= i < self.height and 0 <= j < self.width:
+                    if (i, j) in self.mines:
+                        count -= 1
+                    elif (i, j) not in self.safes:
+                        neighbor_cells.add((i, j))
+        self.add_sentence(Sentence(neighbor_cells, count))
 
-        # 4) mark any additional cells as safe or as mines
-        #                if it can be concluded based on the AI's knowledge base
-        for sentence in self.knowledge:
-            mines = sentence.known_mines().copy()
-            for mine in mines:
-                self.mark_mine(mine)
-
-            safes = sentence.known_safes().copy()
-            for safe in safes:
-                self.mark_safe(safe)
-        # extra checking
-        for safe in self.safes:
-            self.mark_safe(safe)
-        for mine in self.mines:
-            self.mark_mine(mine)
-        # removing empty sentences
-        self.knowledge = [sentence for sentence in self.knowledge if not sentence.is_empty()]
-        # for i in range(len(self.knowledge)):
-        #     if self.knowledge[i].is_empty():
-        #         self.knowledge.pop(i)
-        #         i -= 1
-
-        # 5) add any new sentences to the AI's knowledge base
-        #                if they can be inferred from existing knowledge
-        new_knowledge = []
-        for i in range(len(self.knowledge)):
-            s1 = self.knowledge[i]
-            for j in range(i, len(self.knowledge)):
-                s2 = self.knowledge[j]
-                if s1 == s2:
-                    continue
-                if s1.cells <= s2.cells:
-                    new_cells = s2.cells - s1.cells
-                    new_count = s2.count - s1.count
-                    new_sentence = Sentence(new_cells, new_count)
-                    new_knowledge.append(new_sentence)
-        self.knowledge.extend(new_knowledge)
-        # raise NotImplementedError
+        # 4) and 5) mark cells and infer new sentences, starting from
+        #                the sentences that changed
+        self.infer()
 
     def make_safe_move(self):
         """
@@ -276,20 +447,112 @@ class MinesweeperAI():
         return move
         # raise NotImplementedError
 
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell not yet chosen or known
+        to be a mine is a mine, as a dict mapping cell to probability.
+        Every board consistent with the knowledge is taken to be equally
+        likely.
+
+        Frontier cells, the ones some sentence mentions, split into
+        components that share no sentence, and each component is counted
+        separately (see count_component). The other cells are
+        unconstrained. With the total number of mines known, a way of
+        placing m mines on the frontier is weighted by the number of
+        ways to place the rest among the other cells. Without it, each
+        other cell is as likely to be a mine as not.
+        """
+        unknown = {
+            (i, j) for i in range(self.height) for j in range(self.width)
+        } - self.moves_made - self.mines
+        if not unknown:
+            return {}
+
+        # Group the frontier cells into components sharing sentences
+        components = []
+        seen = set()
+        for root in self.cell_sentences:
+            if root in seen or not self.cell_sentences[root]:
+                continue
+            seen.add(root)
+            cells, sentences = [], set()
+            queue = deque([root])
+            while queue:
+                cell = queue.popleft()
+                cells.append(cell)
+                for sentence in self.cell_sentences[cell]:
+                    if sentence in sentences:
+                        continue
+                    sentences.add(sentence)
+                    for neighbor in sentence.cells:
+                        if neighbor not in seen:
+                            seen.add(neighbor)
+                            queue.append(neighbor)
+            components.append(count_component(cells, sentences))
+
+        others = unknown - seen
+        remaining = None if self.total_mines is None else self.total_mines - len(self.mines)
+
+        probabilities = {}
+        if remaining is not None:
+            # outside[k]: ways to place k mines among the other cells
+            outside = [comb(len(others), k) for k in range(max(remaining, 0) + 1)]
+
+            # weights[c][m]: ways to complete the board when component c
+            # holds m mines, summed over all the other components
+            weights = []
+            for c in range(len(components)):
+                rest = [1]
+                for d, (total, _) in enumerate(components):
+                    if d != c:
+                        rest = convolve(rest, total)
+                weights.append([
+                    sum(ways * outside[remaining - m - f]
+                        for f, ways in enumerate(rest) if remaining - m - f >= 0)
+                    for m in range(len(components[c][0]))
+                ])
+
+            everything = [1]
+            for total, _ in components:
+                everything = convolve(everything, total)
+            boards = sum(ways * outside[remaining - f]
+                         for f, ways in enumerate(everything) if remaining - f >= 0)
+
+        if remaining is None or not boards:
+            # Mine total unknown, or inconsistent with the knowledge
+            for total, per_cell in components:
+                for cell, mines in per_cell.items():
+                    probabilities[cell] = sum(mines) / sum(total)
+            for cell in others:
+                probabilities[cell] = 0.5
+            return probabilities
+
+        for (total, per_cell), weight in zip(components, weights):
+            for cell, mines in per_cell.items():
+                probabilities[cell] = sum(
+                    ways * w for ways, w in zip(mines, weight)
+                ) / boards
+        if others:
+            other_mines = sum(ways * comb(len(others) - 1, remaining - f - 1)
+                              for f, ways in enumerate(everything) if remaining - f >= 1)
+            for cell in others:
+                probabilities[cell] = other_mines / boards
+        return probabilities
+
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
-        Should choose randomly among cells that:
+        Chooses among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        the one least likely to be a mine (see mine_probabilities),
+        breaking ties randomly.
         """
-        all_cells = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                all_cells.add((i, j))
-        possible_moves = all_cells - self.moves_made - self.mines
-        if not possible_moves:
+        probabilities = self.mine_probabilities()
+        if not probabilities:
             return None
-        move = possible_moves.pop()
-        return move
-        # raise NotImplementedError
+        lowest = min(probabilities.values())
+        return random.choice(sorted(
+            cell for cell, probability in probabilities.items()
+            if probability <= lowest + 1e-12
+        ))
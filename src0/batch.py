@@ -0,0 +1,95 @@
+import argparse
+import csv
+import os
+import sys
+from multiprocessing import Pool
+
+from maze import ALGORITHMS, GridMaze, Maze
+
+FIELDS = ["file", "algorithm", "height", "width", "path_length", "explored", "time", "error"]
+
+
+def solve_file(job):
+    """
+    Solves one maze file in a worker process. Returns its CSV row and,
+    if `keep` is set, the solution and explored cells for rendering.
+    """
+    path, algorithm, grid, keep = job
+    row = {"file": os.path.basename(path), "algorithm": algorithm}
+    try:
+        m = (GridMaze if grid else Maze)(path)
+        row["height"], row["width"] = m.height, m.width
+        m.solve(algorithm)
+    except Exception as e:
+        row["error"] = str(e)
+        return row, None
+    row["path_length"] = len(m.solution[0])
+    row["explored"] = m.num_explored
+    row["time"] = f"{m.solve_time:.6f}"
+    return row, (m.solution, m.explored) if keep else None
+
+
+def render_file(job):
+    """
+    Draws a solved maze to a PNG, scaled down by output_image
+    for large mazes.
+    """
+    path, grid, solution, explored, filename = job
+    m = (GridMaze if grid else Maze)(path)
+    m.solution = solution
+    m.explored = explored
+    m.output_image(filename, show_explored=True)
+    return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="batch.py",
+        description="Solve every maze in a directory in parallel and write a CSV."
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--algorithm", default="astar", choices=ALGORITHMS)
+    parser.add_argument("--grid", action="store_true",
+                        help="use the packed NumPy grid backend (GridMaze)")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", help="CSV file to write (default: stdout)")
+    parser.add_argument("--images", metavar="DIR",
+                        help="also draw each solved maze into DIR")
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.directory, name) for name in os.listdir(args.directory)
+        if name.endswith(".txt")
+    )
+    if args.images:
+        os.makedirs(args.images, exist_ok=True)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        with Pool(args.processes) as pool:
+            jobs = [(path, args.algorithm, args.grid, bool(args.images)) for path in paths]
+            renders = []
+
+            # Rows are written as soon as each maze is solved; drawing is
+            # queued behind the remaining solves instead of holding them up
+            for row, result in pool.imap_unordered(solve_file, jobs):
+                writer.writerow(row)
+                out.flush()
+                if result is not None:
+                    solution, explored = result
+                    name = os.path.splitext(row["file"])[0] + ".png"
+                    renders.append(pool.apply_async(render_file, ((
+                        os.path.join(args.directory, row["file"]), args.grid,
+                        solution, explored, os.path.join(args.images, name)
+                    ),)))
+            for render in renders:
+                render.get()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
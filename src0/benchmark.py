@@ -0,0 +1,43 @@
+import random
+import sys
+import time
+
+from maze import GridMaze
+
+filename = sys.argv[1] if len(sys.argv) > 1 else "maze2.txt"
+starts = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+m = GridMaze(filename)
+random.seed(0)
+open_cells = [(i, j) for i in range(m.height) for j in range(m.width)
+              if not m.walls[i][j]]
+samples = random.sample(open_cells, min(starts, len(open_cells)))
+
+start_time = time.time()
+m.distance_field()
+field_time = time.time() - start_time
+start_time = time.time()
+field_lengths = []
+for start in samples:
+    try:
+        field_lengths.append(len(m.path_from(start)[0]))
+    except Exception:
+        field_lengths.append(None)
+descent_time = time.time() - start_time
+
+start_time = time.time()
+solve_lengths = []
+for start in samples:
+    m.start = start
+    try:
+        m.solve("bfs")
+        solve_lengths.append(len(m.solution[0]))
+    except Exception:
+        solve_lengths.append(None)
+solve_time = time.time() - start_time
+
+if field_lengths != solve_lengths:
+    sys.exit("Path lengths differ.")
+print(f"Starts: {len(samples)}")
+print(f"Distance field: {field_time:.3f} seconds, then {descent_time:.3f} seconds of descents")
+print(f"Repeated BFS:   {solve_time:.3f} seconds")
@@ -1,44 +1,87 @@
-import sys
+import argparse
+import heapq
+import itertools
+import time
+from array import array
+from collections import deque
 
 
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 
 class StackFrontier():
+    """
+    LIFO frontier backed by a deque, with a hash index from
+    each state to the number of frontier nodes holding it, so
+    that add, remove and contains_state all run in O(1).
+    """
+
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
+
+    def __len__(self):
+        return len(self.frontier)
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
 
+    def _pop(self):
+        return self.frontier.pop()
+
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self._pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
             return node
 
 
 class QueueFrontier(StackFrontier):
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Binary-heap frontier: remove returns the node with the lowest
+    priority(node), oldest first among equal priorities.
+    """
+
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.priority(node), next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _pop(self):
+        return heapq.heappop(self.frontier)[2]
+
+
+# Search algorithms Maze.solve accepts
+ALGORITHMS = ("dfs", "bfs", "greedy", "astar", "jps")
 
 
 class Maze():
@@ -46,19 +89,7 @@ class Maze():
     def __init__(self, filename):
 
         # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
-
-        # Validate start and goal
-        if contents.count("A") != 1:
-            raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
-            raise Exception("maze must have exactly one goal")
-
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
+        contents = self._read(filename)
 
         # Keep track of walls
         self.walls = []
@@ -83,6 +114,27 @@ class Maze():
         self.solution = None
 
 
+    def _read(self, filename):
+        """
+        Reads a maze file, checks it has one start and one goal, and
+        sets height and width. Returns the lines of the maze.
+        """
+        with open(filename) as f:
+            contents = f.read()
+
+        # Validate start and goal
+        if contents.count("A") != 1:
+            raise Exception("maze must have exactly one start point")
+        if contents.count("B") != 1:
+            raise Exception("maze must have exactly one goal")
+
+        # Determine height and width of maze
+        contents = contents.splitlines()
+        self.height = len(contents)
+        self.width = max(len(line) for line in contents)
+        return contents
+
+
     def print(self):
         solution = self.solution[1] if self.solution is not None else None
         print()
@@ -118,29 +170,59 @@ class Maze():
         return result
 
 
-    def solve(self):
+    def heuristic(self, state):
+        """Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+    def frontier_for(self, algorithm):
+        """Returns an empty frontier implementing a search algorithm."""
+        if algorithm == "dfs":
+            return StackFrontier()
+        elif algorithm == "bfs":
+            return QueueFrontier()
+        elif algorithm == "greedy":
+            return PriorityFrontier(lambda node: self.heuristic(node.state))
+        elif algorithm == "astar":
+            # Among equal f = g + h, prefer the node closest to the goal
+            def priority(node):
+                h = self.heuristic(node.state)
+                return (node.cost + h, h)
+            return PriorityFrontier(priority)
+        raise ValueError(f"unknown algorithm: {algorithm}")
+
+    def solve(self, algorithm="dfs"):
         """Finds a solution to maze, if one exists."""
+        if algorithm == "jps":
+            return self.solve_jps()
 
-        # Keep track of number of states explored
+        # Keep track of number of states explored and time taken
         self.num_explored = 0
+        start_time = time.perf_counter()
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        frontier = self.frontier_for(algorithm)
         frontier.add(start)
 
         # Initialize an empty explored set
         self.explored = set()
 
+        # A* may find a cheaper way to a state already in the frontier,
+        # so it tracks the best cost so far instead of frontier membership
+        best_cost = {self.start: 0}
+
         # Keep looping until solution found
         while True:
 
             # If nothing left in frontier, then no path
             if frontier.empty():
+                self.solve_time = time.perf_counter() - start_time
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
+            # Choose a node from the frontier, skipping superseded A* entries
             node = frontier.remove()
+            if node.state in self.explored:
+                continue
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
@@ -154,6 +236,7 @@ class Maze():
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                self.solve_time = time.perf_counter() - start_time
                 return
 
             # Mark node as explored
@@ -161,71 +244,454 @@ class Maze():
 
             # Add neighbors to frontier
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
+                cost = node.cost + 1
+                if algorithm == "astar":
+                    if state in self.explored or cost >= best_cost.get(state, cost + 1):
+                        continue
+                    best_cost[state] = cost
+                elif frontier.contains_state(state) or state in self.explored:
+                    continue
+                child = Node(state=state, parent=node, action=action, cost=cost)
+                frontier.add(child)
+
+
+    def solve_jps(self):
+        """
+        Finds a shortest solution with Jump Point Search: A* over the
+        4-connected grid that only expands "jump points", skipping
+        straight runs of cells that any optimal path would pass
+        straight through. num_explored counts expanded jump points.
+        """
+        self.num_explored = 0
+        start_time = time.perf_counter()
+
+        walls = self.walls.tolist() if hasattr(self.walls, "tolist") else self.walls
+        height, width, goal = self.height, self.width, self.goal
+
+        def walkable(row, col):
+            return 0 <= row < height and 0 <= col < width and not walls[row][col]
+
+        def jump(row, col, d_row, d_col):
+            """
+            Moves from (row, col) in direction (d_row, d_col) until
+            reaching a jump point, which is returned, or a wall (None).
+            """
+            while True:
+                row += d_row
+                col += d_col
+                if not walkable(row, col):
+                    return None
+                if (row, col) == goal:
+                    return (row, col)
+                if d_col:
+                    # Horizontal: stop where a wall behind opens up or down
+                    if ((walkable(row - 1, col) and not walkable(row - 1, col - d_col))
+                            or (walkable(row + 1, col) and not walkable(row + 1, col - d_col))):
+                        return (row, col)
+                else:
+                    # Vertical: stop where a wall behind opens left or right,
+                    # or where a horizontal jump from here finds a jump point
+                    if ((walkable(row, col - 1) and not walkable(row - d_row, col - 1))
+                            or (walkable(row, col + 1) and not walkable(row - d_row, col + 1))):
+                        return (row, col)
+                    if jump(row, col, 0, 1) or jump(row, col, 0, -1):
+                        return (row, col)
+
+        directions = ((-1, 0), (1, 0), (0, -1), (0, 1))
+        parents = {self.start: None}
+        best_cost = {self.start: 0}
+        self.explored = set()
+        counter = itertools.count()
+        frontier = [(self.heuristic(self.start), 0, next(counter), self.start)]
 
+        while frontier:
+            _, _, _, state = heapq.heappop(frontier)
+            if state in self.explored:
+                continue
+            self.num_explored += 1
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
+            if state == goal:
+                jump_points = []
+                while state is not None:
+                    jump_points.append(state)
+                    state = parents[state]
+                jump_points.reverse()
+                self.solution = self.fill_path(jump_points)
+                self.solve_time = time.perf_counter() - start_time
+                return
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
+            self.explored.add(state)
+
+            # Go on in every direction except back towards the parent
+            parent = parents[state]
+            for d_row, d_col in directions:
+                if parent is not None and (
+                    (d_row and (parent[0] - state[0]) * d_row > 0)
+                    or (d_col and (parent[1] - state[1]) * d_col > 0)
+                ):
+                    continue
+                point = jump(state[0], state[1], d_row, d_col)
+                if point is None or point in self.explored:
+                    continue
+                cost = best_cost[state] + abs(point[0] - state[0]) + abs(point[1] - state[1])
+                if cost >= best_cost.get(point, cost + 1):
+                    continue
+                best_cost[point] = cost
+                parents[point] = state
+                h = self.heuristic(point)
+                heapq.heappush(frontier, (cost + h, h, next(counter), point))
+
+        self.solve_time = time.perf_counter() - start_time
+        raise Exception("no solution")
+
+    def fill_path(self, points):
+        """
+        Expands a list of cells, each in a straight line from the one
+        before, into the (actions, cells) solution stepping through
+        every cell in between.
+        """
+        actions = []
+        cells = []
+        for (row, col), (next_row, next_col) in zip(points, points[1:]):
+            d_row = (next_row > row) - (next_row < row)
+            d_col = (next_col > col) - (next_col < col)
+            action = {(-1, 0): "up", (1, 0): "down", (0, -1): "left", (0, 1): "right"}[(d_row, d_col)]
+            while (row, col) != (next_row, next_col):
+                row += d_row
+                col += d_col
+                actions.append(action)
+                cells.append((row, col))
+        return actions, cells
+
+    def distance_field(self):
+        """
+        Returns a NumPy array of the number of steps from every cell to
+        the goal (-1 for walls and unreachable cells), also kept as
+        self.distances.
+
+        The BFS runs as a vectorized wavefront: each step expands the
+        whole current layer of flat cell indices at once.
+        """
+        import numpy as np
+
+        walls = np.asarray(self.walls, dtype=bool)
+        stride = self.width + 2
+        open_cells = np.zeros((self.height + 2, stride), dtype=bool)
+        open_cells[1:-1, 1:-1] = ~walls
+        open_cells = open_cells.ravel()
+        offsets = np.array([-stride, stride, -1, 1])
+
+        distances = np.full(open_cells.size, -1, dtype=np.int32)
+        layer = np.array([(self.goal[0] + 1) * stride + self.goal[1] + 1])
+        distances[layer] = 0
+        step = 0
+        while layer.size:
+            step += 1
+            candidates = (layer[:, None] + offsets).ravel()
+            candidates = candidates[open_cells[candidates] & (distances[candidates] == -1)]
+            layer = np.unique(candidates)
+            distances[layer] = step
+
+        self.distances = distances.reshape(self.height + 2, stride)[1:-1, 1:-1].copy()
+        return self.distances
+
+    def path_from(self, start):
+        """
+        Returns the (actions, cells) solution from `start` to the goal by
+        walking downhill on the distance field, computing it if needed.
+        """
+        if getattr(self, "distances", None) is None:
+            self.distance_field()
+        distances = self.distances
+        if distances[start] == -1:
+            raise Exception("no solution")
+
+        actions = []
+        cells = []
+        state = start
+        while state != self.goal:
+            for action, neighbor in self.neighbors(state):
+                if distances[neighbor] == distances[state] - 1:
+                    actions.append(action)
+                    cells.append(neighbor)
+                    state = neighbor
+                    break
+        return actions, cells
+
+    def cell_mask(self, cells):
+        """Returns a (height, width) NumPy bool mask of the given cells."""
+        import numpy as np
+
+        if isinstance(cells, CellMask):
+            stride = self.width + 2
+            mask = np.frombuffer(cells.mask, dtype=np.uint8)
+            return mask.reshape(self.height + 2, stride)[1:-1, 1:-1].astype(bool)
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        if cells:
+            rows, cols = zip(*cells)
+            mask[list(rows), list(cols)] = True
+        return mask
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=None, cell_border=None):
+        """
+        Draws the maze to a PNG. By default cells are 50 pixels, or
+        smaller for large mazes so the longer side stays under about
+        4000 pixels, with borders scaled to match.
+        """
+        import numpy as np
+        from PIL import Image
+
+        if cell_size is None:
+            cell_size = min(50, max(1, 4000 // max(self.height, self.width)))
+        if cell_border is None:
+            cell_border = cell_size // 25
+
+        # One RGB color per cell, later rules painting over earlier ones
+        # in reverse order of precedence
+        colors = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        # Empty cell
+        colors[:] = (237, 240, 252)
 
         solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
 
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
+        # Explored
+        if solution is not None and show_explored:
+            colors[self.cell_mask(self.explored)] = (212, 97, 85)
 
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+        # Solution
+        if solution is not None and show_solution:
+            colors[self.cell_mask(solution)] = (220, 235, 113)
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+        # Goal and start
+        colors[self.goal] = (0, 171, 28)
+        colors[self.start] = (255, 0, 0)
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+        # Walls
+        colors[np.asarray(self.walls, dtype=bool)] = (40, 40, 40)
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+        # Scale each cell up to a block, with a black border around it
+        pixels = colors.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+        inside = np.zeros(cell_size, dtype=bool)
+        inside[cell_border:cell_size - cell_border + 1] = True
+        rows = np.tile(inside, self.height)
+        cols = np.tile(inside, self.width)
+        pixels[~rows] = 0
+        pixels[:, ~cols] = 0
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+        img = np.full(pixels.shape[:2] + (4,), 255, dtype=np.uint8)
+        img[..., :3] = pixels
+        Image.fromarray(img, "RGBA").save(filename)
+
+
+class CellMask():
+    """
+    Read-only, set-like view of the cells flagged in a GridMaze mask,
+    used in place of a set of (row, col) tuples.
+    """
+
+    def __init__(self, mask, maze):
+        self.mask = mask
+        self.maze = maze
+
+    def __contains__(self, cell):
+        i, j = cell
+        if not (0 <= i < self.maze.height and 0 <= j < self.maze.width):
+            return False
+        return bool(self.mask[self.maze.index(cell)])
+
+    def __len__(self):
+        return self.mask.count(1)
+
+    def __iter__(self):
+        for index, flag in enumerate(self.mask):
+            if flag:
+                yield self.maze.cell(index)
+
+
+class GridMaze(Maze):
+    """
+    Maze backed by a packed grid instead of lists of lists.
+
+    Walls are a NumPy bool array, and the search runs over flat integer
+    cell indices into a copy of the grid padded with a border of walls,
+    so the four neighbors of index i are always i - stride, i + stride,
+    i - 1 and i + 1, with no bounds checks. Visited cells are a byte
+    mask and parents an int array, instead of Node objects and sets.
+    """
+
+    def __init__(self, filename):
+        import numpy as np
+
+        # Read file and set height and width of maze
+        contents = self._read(filename)
+
+        # One code point per cell, with short lines padded by spaces
+        codes = np.full((self.height, self.width), ord(" "), dtype=np.uint32)
+        for i, line in enumerate(contents):
+            codes[i, :len(line)] = np.frombuffer(line.encode("utf-32-le"), dtype="<u4")
+        self.start = tuple(int(x) for x in np.argwhere(codes == ord("A"))[0])
+        self.goal = tuple(int(x) for x in np.argwhere(codes == ord("B"))[0])
+        self.walls = ((codes != ord(" ")) & (codes != ord("A")) & (codes != ord("B")))
+
+        # Open cells of the padded grid, as bytes for fast scalar access
+        self.stride = self.width + 2
+        padded = np.zeros((self.height + 2, self.stride), dtype=np.uint8)
+        padded[1:-1, 1:-1] = ~self.walls
+        self.open = padded.tobytes()
+        self.offsets = (
+            ("up", -self.stride),
+            ("down", self.stride),
+            ("left", -1),
+            ("right", 1)
+        )
+
+        self.solution = None
+
+    def index(self, state):
+        """Flat index of a (row, col) cell in the padded grid."""
+        return (state[0] + 1) * self.stride + state[1] + 1
+
+    def cell(self, index):
+        """(row, col) cell of a flat index in the padded grid."""
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def neighbors(self, state):
+        index = self.index(state)
+        return [(action, self.cell(index + offset))
+                for action, offset in self.offsets if self.open[index + offset]]
+
+    def solve(self, algorithm="dfs"):
+        """Finds a solution to maze, if one exists."""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm: {algorithm}")
+        if algorithm == "jps":
+            return self.solve_jps()
+        start_time = time.perf_counter()
+
+        size = len(self.open)
+        start, goal = self.index(self.start), self.index(self.goal)
+        goal_row, goal_col = divmod(goal, self.stride)
+        stride, open_cells, offsets = self.stride, self.open, self.offsets
+
+        # parent[i] is the index i was reached from, by offsets[move[i]]
+        parent = array("i", [-1]) * size
+        move = bytearray(size)
+        explored = bytearray(size)
+        reached = bytearray(size)
+        cost = array("i", [0]) * size
+        counter = itertools.count()
+        num_explored = 0
+
+        def heuristic(index):
+            row, col = divmod(index, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        # Same orderings as the Node-based frontiers, so both backends
+        # explore the same cells
+        if algorithm == "dfs":
+            frontier = [start]
+            remove = frontier.pop
+            add = frontier.append
+        elif algorithm == "bfs":
+            frontier = deque([start])
+            remove = frontier.popleft
+            add = frontier.append
+        else:
+            frontier = [(0, 0, next(counter), start)]
+
+            def remove():
+                return heapq.heappop(frontier)[3]
+
+            if algorithm == "greedy":
+                def add(index):
+                    heapq.heappush(frontier, (heuristic(index), 0, next(counter), index))
+            else:
+                def add(index):
+                    h = heuristic(index)
+                    heapq.heappush(frontier, (cost[index] + h, h, next(counter), index))
+        reached[start] = 1
+        astar = algorithm == "astar"
+        steps = tuple((k, offset) for k, (_, offset) in enumerate(offsets))
+
+        while True:
+
+            # If nothing left in frontier, then no path
+            if not frontier:
+                self.num_explored = num_explored
+                self.explored = CellMask(explored, self)
+                self.solve_time = time.perf_counter() - start_time
+                raise Exception("no solution")
+
+            # Choose a cell from the frontier, skipping superseded A* entries
+            index = remove()
+            if explored[index]:
+                continue
+            num_explored += 1
+
+            # If cell is the goal, then we have a solution
+            if index == goal:
+                actions = []
+                cells = []
+                while index != start:
+                    actions.append(offsets[move[index]][0])
+                    cells.append(self.cell(index))
+                    index = parent[index]
+                actions.reverse()
+                cells.reverse()
+                self.solution = (actions, cells)
+                self.num_explored = num_explored
+                self.explored = CellMask(explored, self)
+                self.solve_time = time.perf_counter() - start_time
+                return
+
+            # Mark cell as explored
+            explored[index] = 1
+
+            # Add neighbors to frontier
+            next_cost = cost[index] + 1
+            for k, offset in steps:
+                neighbor = index + offset
+                if not open_cells[neighbor] or explored[neighbor]:
+                    continue
+                if reached[neighbor] and (not astar or next_cost >= cost[neighbor]):
+                    continue
+                reached[neighbor] = 1
+                cost[neighbor] = next_cost
+                parent[neighbor] = index
+                move[neighbor] = k
+                add(neighbor)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="maze.py", description="Solve a maze.")
+    parser.add_argument("filename")
+    parser.add_argument("algorithm", nargs="?", default="dfs", choices=ALGORITHMS + ("all",))
+    parser.add_argument("--grid", action="store_true",
+                        help="use the packed NumPy grid backend (GridMaze)")
+    args = parser.parse_args()
+    algorithm = args.algorithm
+
+    m = (GridMaze if args.grid else Maze)(args.filename)
+    if algorithm == "all":
+        for algorithm in ALGORITHMS:
+            m.solve(algorithm)
+            print(f"{algorithm:7} path length: {len(m.solution[0]):6}  "
+                  f"states explored: {m.num_explored:8}  time: {m.solve_time:.3f}s")
+        return
+
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(algorithm)
+    print("States Explored:", m.num_explored)
+    print(f"Time: {m.solve_time:.3f}s")
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()